@@ -97,7 +97,8 @@ export const extractTextFromPDF = action({
         fileName,
       );
 
-      response = await fetch(`${PADDLEOCR_URL}${endpoint}`, {
+      // Nur markdown anfordern: structured enthält denselben Text noch einmal.
+      response = await fetch(`${PADDLEOCR_URL}${endpoint}?view=markdown`, {
         method: "POST",
         headers: ocrHeaders(),
         body: formData,
@@ -114,6 +115,7 @@ export const extractTextFromPDF = action({
         headers: ocrHeaders({ "Content-Type": "application/json" }),
         body: JSON.stringify({
           pdf: args.pdfBase64,
+          view: "markdown",
         }),
       });
     }
@@ -137,6 +139,73 @@ export const extractTextFromPDF = action({
   },
 });
 
+// ============================================================================
+// AUFWANDSSCHÄTZUNG VOR DER EXTRAKTION
+// ============================================================================
+
+// Liest beim Service nur PDF-Struktur und Textlayer-Stichprobe: Seitenzahl,
+// Textlayer pro Seite, Pixelfläche und geschätzte Dauer. Damit lässt sich vor
+// extractTextFromPDF entscheiden, ob synchron verarbeitet oder ein Job
+// angelegt wird, und eine realistische Fortschrittsanzeige bauen.
+export const estimatePDFExtraction = action({
+  args: {
+    storageId: v.id("_storage"),
+    fileName: v.string(),
+  },
+  handler: async (ctx, args) => {
+    const identity = await requireIdentity(ctx);
+
+    const PADDLEOCR_URL = process.env.PADDLEOCR_URL;
+    if (!PADDLEOCR_URL) {
+      throw new Error("PADDLEOCR_URL nicht konfiguriert");
+    }
+
+    const owner = await ctx.runQuery(internal.storage.getFileOwner, {
+      storageId: args.storageId,
+    });
+    if (!owner || owner.userId !== identity.subject) {
+      throw new Error("Nicht autorisiert für diese Datei.");
+    }
+    if (owner.fileSize && owner.fileSize > MAX_PDF_BYTES) {
+      throw new Error("Datei ist zu groß.");
+    }
+
+    const storedFile = await ctx.storage.get(args.storageId);
+    if (!storedFile) {
+      throw new Error("Datei wurde im Convex Storage nicht gefunden.");
+    }
+
+    const fileName = sanitizeFileName(args.fileName);
+    const formData = new FormData();
+    formData.append(
+      "file",
+      new Blob([await storedFile.arrayBuffer()], { type: "application/pdf" }),
+      fileName,
+    );
+
+    const response = await fetch(`${PADDLEOCR_URL}/estimate`, {
+      method: "POST",
+      headers: ocrHeaders(),
+      body: formData,
+    });
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`OCR service error (${response.status}): ${errorText}`);
+    }
+
+    const result = await response.json();
+    return {
+      pages: result.pages as number,
+      method: result.method as "text-layer" | "ocr",
+      estimatedSeconds: result.estimated_seconds as number,
+      recommended: result.recommended as "sync" | "async",
+      pageSeconds: (result.page_details as { estimated_seconds: number }[]).map(
+        (page) => page.estimated_seconds,
+      ),
+    };
+  },
+});
+
 // ============================================================================
 // HEALTH CHECK FOR OCR SERVICE
 // ============================================================================
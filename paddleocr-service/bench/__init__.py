@@ -0,0 +1 @@
+"""Mess-Skripte für den Extraktions-Service (nicht Teil des Servers)."""
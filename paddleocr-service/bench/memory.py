@@ -0,0 +1,272 @@
+"""
+Spitzen-Speicher der Extraktionspfade messen und gegen Obergrenzen prüfen.
+
+    python -m bench.memory [--only pdf-scan] [--ceilings bench/memory_ceilings.json]
+                           [--ocr-workers 0] [--json ergebnis.json]
+
+Railway beendet den Container beim Erreichen des Plan-Limits (OOM-Kill);
+die Grenze ist Speicher, nicht CPU. Das Skript ruft process_pdf_content
+(Textlayer und Scan), process_document_content (DOCX/XLSX) und
+process_image_content mit Eingaben steigender Größe auf. Jeder Fall läuft
+in einem frischen Prozess, nach einer Aufwärm-Extraktion derselben Art
+(Modelle geladen, Puffer angelegt — wie im laufenden Dienst). Gemessen
+wird
+
+- tracemalloc: Spitze der Python-/NumPy-Allokationen während des Falls,
+- RSS: alle 5 ms abgetastet, Summe aus Prozess und OCR-Workern, als
+  Zuwachs über dem Stand vor dem Fall (erfasst auch PIL, PDFium, Paddle).
+
+Gemeldet wird die Spitze absolut, pro Seite und pro MB Eingabe. Die
+Obergrenzen stehen je Pfad in bench/memory_ceilings.json (peak_rss_mb,
+rss_mb_per_page, rss_mb_per_input_mb, peak_traced_mb). Schlägt ein Fall
+fehl (Exception, OOM-Kill des Fall-Prozesses), wird der Fehler festgehalten
+und mit dem nächsten Fall weitergemacht; --json enthält auch die Fehler.
+Wird eine Obergrenze überschritten oder schlägt ein Fall fehl, endet das
+Skript mit Exit-Code 1.
+"""
+
+import argparse
+import gc
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CEILINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory_ceilings.json")
+
+SAMPLE_INTERVAL = 0.005
+MB = 1024 * 1024
+
+# Pfad -> Größenstufen (Seiten, Zeilen bzw. Megapixel)
+CASES = {
+    "pdf-text": (1, 20, 100),
+    "pdf-scan": (1, 5, 20),
+    "image": (2, 12, 48),
+    "docx": (50, 500, 2000),
+    "xlsx": (1000, 10000, 50000),
+}
+
+
+def make_input(path: str, size: int) -> tuple[bytes, str]:
+    """Synthetic input of the given size grade and its file extension."""
+    import self_benchmark
+    from PIL import Image
+
+    if path == "pdf-text":
+        return self_benchmark.sample_text_pdf(size), ".pdf"
+    if path == "pdf-scan":
+        page = self_benchmark.sample_page(150)
+        buf = io.BytesIO()
+        page.save(buf, "PDF", resolution=150, save_all=True, append_images=[page] * (size - 1))
+        return buf.getvalue(), ".pdf"
+    if path == "image":
+        # Handyfoto: Arbeitsblatt auf size Megapixel hochskaliert, als JPEG
+        page = self_benchmark.sample_page(150)
+        scale = (size * 1e6 / (page.width * page.height)) ** 0.5
+        page = page.resize((round(page.width * scale), round(page.height * scale)), Image.BILINEAR)
+        buf = io.BytesIO()
+        page.save(buf, "JPEG", quality=90)
+        return buf.getvalue(), ".jpg"
+    if path == "docx":
+        import docx
+
+        document = docx.Document()
+        for i in range(size):
+            if i % 10 == 0:
+                document.add_heading(f"Abschnitt {i // 10 + 1}", level=1)
+            document.add_paragraph(" ".join(self_benchmark.SAMPLE_LINES[:4]))
+        buf = io.BytesIO()
+        document.save(buf)
+        return buf.getvalue(), ".docx"
+    if path == "xlsx":
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Noten")
+        sheet.append(["Name", "Klasse", "Fach", "Note", "Bemerkung"])
+        for i in range(size):
+            sheet.append([f"Schüler {i}", f"{4 + i % 6}b", "Mathematik", 1 + i % 6, "Hausaufgaben vollständig"])
+        buf = io.BytesIO()
+        workbook.save(buf)
+        return buf.getvalue(), ".xlsx"
+    raise ValueError(f"unknown path {path!r}")
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class RSSSampler:
+    """Background thread sampling the RSS of this process and the OCR workers."""
+
+    def __init__(self, pids) -> None:
+        self._pids = pids
+        self._stop = threading.Event()
+        self.peak = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def current(self) -> int:
+        return sum(_rss_bytes(pid) for pid in [os.getpid(), *self._pids()])
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            time.sleep(SAMPLE_INTERVAL)
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def _extract(main, path: str, content: bytes, ext: str):
+    profile = main.profiles.get_profile(None)
+    if path.startswith("pdf"):
+        return main.process_pdf_content(content, profile)
+    if path == "image":
+        return main.process_image_content(content, profile)
+    return main.process_document_content(content, ext)
+
+
+def _run_case(path: str, size: int, result: dict) -> None:
+    """Body of the per-case process: warm up, then measure one extraction."""
+    import main
+
+    main.start_ocr()
+    try:
+        def worker_pids():
+            if main.pool is None:
+                return []
+            return [w["pid"] for w in main.pool.stats()["workers"]]
+
+        # Aufwärmen; die OCR-Zeile wartet, bis die Worker ihre Modelle geladen haben
+        import self_benchmark
+
+        main.recognize_image(self_benchmark.sample_page(100), main.profiles.get_profile(None), use_cache=False)
+        _extract(main, path, *make_input(path, CASES[path][0]))
+        content, ext = make_input(path, size)
+        gc.collect()
+
+        sampler = RSSSampler(worker_pids)
+        baseline = sampler.current()
+        tracemalloc.start()
+        with sampler:
+            response = _extract(main, path, content, ext)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result.update(
+            input_mb=len(content) / MB,
+            pages=response.pages,
+            peak_traced_mb=traced_peak / MB,
+            peak_rss_mb=max(0, sampler.peak - baseline) / MB,
+        )
+    finally:
+        main.stop_ocr()
+
+
+def _case_process(path: str, size: int, conn) -> None:
+    result: dict = {}
+    try:
+        _run_case(path, size, result)
+        conn.send(("ok", result))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+def measure(path: str, size: int) -> dict:
+    """Run one case in a fresh process and return its measurements."""
+    ctx = mp.get_context("spawn")
+    parent, child = ctx.Pipe()
+    process = ctx.Process(target=_case_process, args=(path, size, child))
+    process.start()
+    child.close()
+    try:
+        status, payload = parent.recv()
+    except EOFError:
+        status, payload = "error", "process died (OOM-Kill?)"
+    process.join()
+    if status != "ok":
+        raise RuntimeError(payload)
+    pages = max(1, payload["pages"])
+    payload["rss_mb_per_page"] = payload["peak_rss_mb"] / pages
+    payload["rss_mb_per_input_mb"] = payload["peak_rss_mb"] / max(payload["input_mb"], 0.01)
+    return payload
+
+
+def check(path: str, result: dict, ceilings: dict) -> list[str]:
+    """Names of the ceilings this result exceeds."""
+    return [
+        f"{metric} {result[metric]:.1f} > {limit}"
+        for metric, limit in ceilings.get(path, {}).items()
+        if result[metric] > limit
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", help="kommagetrennte Pfade: " + ",".join(CASES))
+    parser.add_argument("--ceilings", default=CEILINGS_PATH, help="JSON mit Obergrenzen je Pfad")
+    parser.add_argument("--ocr-workers", default=os.getenv("OCR_WORKERS", "1"),
+                        help="OCR_WORKERS für die Messung (0 = OCR im selben Prozess)")
+    parser.add_argument("--json", help="Ergebnis als JSON schreiben")
+    args = parser.parse_args()
+
+    # Gilt für die Fall-Prozesse (spawn erbt die Umgebung); Cache aus, damit
+    # die Aufwärm-Extraktion die Messung nicht bedient.
+    os.environ["OCR_WORKERS"] = str(args.ocr_workers)
+    if str(args.ocr_workers) == "0":
+        os.environ["PAGE_TIMEOUT_SECONDS"] = "0"  # ohne Worker nicht durchsetzbar
+    os.environ["PAGE_CACHE_MAX_MB"] = "0"
+    os.environ["STARTUP_BENCHMARK"] = "0"
+
+    with open(args.ceilings, "r", encoding="utf-8") as f:
+        ceilings = json.load(f)
+    paths = args.only.split(",") if args.only else list(CASES)
+
+    results = []
+    failures = 0
+    print(f"{'path':<9} {'size':>6} {'in MB':>7} {'pages':>6} {'traced':>8} {'RSS':>8} {'/page':>7} {'/MB in':>7}")
+    for path in paths:
+        for size in CASES[path]:
+            try:
+                r = measure(path, size)
+            except Exception as e:
+                failures += 1
+                results.append({"path": path, "size": size, "error": str(e)})
+                print(f"{path:<9} {size:>6}  FAILED: {str(e)}")
+                continue
+            exceeded = check(path, r, ceilings)
+            failures += bool(exceeded)
+            results.append({"path": path, "size": size, **r, "exceeded": exceeded})
+            print(
+                f"{path:<9} {size:>6} {r['input_mb']:>7.2f} {r['pages']:>6} "
+                f"{r['peak_traced_mb']:>8.1f} {r['peak_rss_mb']:>8.1f} "
+                f"{r['rss_mb_per_page']:>7.1f} {r['rss_mb_per_input_mb']:>7.1f}"
+                + ("  CEILING: " + "; ".join(exceeded) if exceeded else "")
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"ocr_workers": args.ocr_workers, "results": results}, f, indent=2)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
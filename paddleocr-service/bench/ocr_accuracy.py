@@ -0,0 +1,302 @@
+"""
+Erkennungsgenauigkeit gegen Geschwindigkeit je Konfiguration messen.
+
+    python -m bench.ocr_accuracy [--profiles fast,balanced] [--preprocess both]
+                                 [--json ergebnis.json] [--compare basis.json]
+
+Jeder Text aus bench/corpus/ (deutsche Schultexte mit Umlauten, ß,
+Zahlen und Lückenstrichen; eigene Korpora per --corpus, eine .txt-Datei je
+Seite) wird als A4-Seite in 300 DPI gesetzt und zu synthetischen Scans
+verschlechtert:
+
+- clean: unverändert
+- noise: Sensorrauschen und Staubpunkte
+- skew:  schief eingelegt (1,5–3°)
+- blur:  unscharf
+- scan:  alles zusammen auf grauem Papier, als JPEG gespeichert
+- photo: Handyfoto (12 MP JPEG): Blatt schräg auf dunklem Tisch, Schatten,
+         hochkant mit EXIF-Orientierung gespeichert
+- strip: zwei Seiten untereinander als ein langes PNG (Screenshot)
+
+clean bis scan sind Bild-PDFs, photo und strip Bild-Uploads. Sie laufen
+durch dieselben Funktionen wie im Dienst (main.process_pdf_content bzw.
+main.process_image_content): Rendern bzw. Aufnahme (image_intake:
+EXIF, Verkleinern), dann main._recognize_page mit Zuschnitt/Begradigung
+und Streifen (strip wird geteilt). OCR läuft dabei im Prozess
+(OCR_WORKERS=0), damit sich die Vorverarbeitung umschalten lässt; der
+Seiten-Cache ist aus. Gemeldet werden je Konfiguration (Profil ×
+Zuschnitt/Begradigung an/aus) Seiten/s (Rendern bzw. Aufnahme + OCR) und
+die Zeichenfehlerrate (CER, Levenshtein-Distanz zum Referenztext / Länge
+der Referenz, Leerraum normalisiert), gesamt und je Verschlechterung.
+
+Mit --compare wird gegen eine frühere --json-Ausgabe verglichen; steigt die
+CER einer Konfiguration um mehr als --max-cer-increase, endet das Skript
+mit Exit-Code 1. So lässt sich eine Beschleunigung auf Daten annehmen oder
+ablehnen. Die Scans sind deterministisch (--seed).
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_preprocess  # noqa: E402
+from profiles import PROFILES  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# Auflösung der synthetischen Vorlage (typische Scanner-Einstellung)
+SOURCE_DPI = 300
+FONT_PT = 12
+LINE_SPACING = 1.6
+
+VARIANTS = ("clean", "noise", "skew", "blur", "scan", "photo", "strip")
+DEFAULT_FONTS = ("DejaVuSans.ttf", "DejaVuSerif.ttf")
+
+
+def load_corpus(directory: str) -> list[tuple[str, str]]:
+    """(name, text) for every .txt file in the directory, sorted by name."""
+    paths = sorted(glob.glob(os.path.join(directory, "*.txt")))
+    if not paths:
+        raise SystemExit(f"no .txt files in {directory}")
+    corpus = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            corpus.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return corpus
+
+
+def typeset(text: str, font_name: str) -> Image.Image:
+    """Text as a white A4 page at SOURCE_DPI, one corpus line per page line."""
+    width, height = round(8.27 * SOURCE_DPI), round(11.69 * SOURCE_DPI)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.truetype(font_name, round(FONT_PT * SOURCE_DPI / 72))
+    margin = SOURCE_DPI
+    y = margin
+    for line in text.splitlines():
+        draw.text((margin, y), line, fill=0, font=font)
+        y += round(FONT_PT * SOURCE_DPI / 72 * LINE_SPACING)
+    return image
+
+
+def _noise(image: Image.Image, rng: random.Random, sigma: float, specks: int) -> Image.Image:
+    gen = np.random.default_rng(rng.randrange(2**32))
+    pixels = np.asarray(image, dtype=np.float32)
+    pixels = pixels + gen.normal(0, sigma, pixels.shape)
+    ys = gen.integers(0, pixels.shape[0], specks)
+    xs = gen.integers(0, pixels.shape[1], specks)
+    pixels[ys, xs] = 0
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def _skew(image: Image.Image, degrees: float) -> Image.Image:
+    return image.rotate(degrees, resample=Image.BILINEAR, expand=True, fillcolor=255)
+
+
+def _photo(page: Image.Image, rng: random.Random) -> bytes:
+    """Phone photo of the page as JPEG, stored sideways with an EXIF orientation."""
+    sheet = page.rotate(rng.uniform(-3.0, 3.0), resample=Image.BILINEAR, expand=True, fillcolor=70)
+    # Das Blatt füllt etwa 80 % des Fotos (wie image_intake.PHOTO_PAGE_FILL)
+    desk = Image.new("L", (round(sheet.width / 0.85), round(sheet.height / 0.85)), 70)
+    desk.paste(sheet, ((desk.width - sheet.width) // 2, (desk.height - sheet.height) // 2))
+    # Schatten: zur unteren rechten Ecke hin bis auf 60 % abgedunkelt
+    ys, xs = np.mgrid[0:desk.height, 0:desk.width]
+    light = 1.0 - 0.4 * (xs / desk.width + ys / desk.height) / 2
+    pixels = np.asarray(desk, dtype=np.float32) * light
+    image = _noise(Image.fromarray(pixels.astype(np.uint8)), rng, sigma=6, specks=0)
+    image = image.resize((3000, round(3000 * image.height / image.width)), Image.BICUBIC)
+    # Hochkant aufgenommen, quer gespeichert: Orientation 6 = 90° im Uhrzeigersinn drehen
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buf = io.BytesIO()
+    image.convert("RGB").transpose(Image.ROTATE_90).save(buf, "JPEG", quality=80, exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def degrade(page: Image.Image, variant: str, rng: random.Random) -> tuple[str, bytes]:
+    """Synthetic scan of a typeset page: ("pdf", single-image PDF) or ("image", upload)."""
+    if variant == "photo":
+        return "image", _photo(page, rng)
+    if variant == "strip":
+        image = Image.new("L", (page.width, 2 * page.height), 255)
+        image.paste(page, (0, 0))
+        image.paste(page, (0, page.height))
+        buf = io.BytesIO()
+        image.save(buf, "PNG")
+        return "image", buf.getvalue()
+
+    image = page
+    quality = None
+    if variant == "noise":
+        image = _noise(image, rng, sigma=14, specks=3000)
+    elif variant == "skew":
+        image = _skew(image, rng.choice((-1, 1)) * rng.uniform(1.5, 3.0))
+    elif variant == "blur":
+        image = image.filter(ImageFilter.GaussianBlur(1.3))
+    elif variant == "scan":
+        image = _skew(image, rng.choice((-1, 1)) * rng.uniform(0.5, 1.5))
+        image = image.filter(ImageFilter.GaussianBlur(0.8))
+        image = Image.eval(image, lambda v: 30 + v * 205 // 255)  # graues Papier, flauer Kontrast
+        image = _noise(image, rng, sigma=8, specks=800)
+        quality = 55
+    elif variant != "clean":
+        raise ValueError(f"unknown variant {variant!r}")
+
+    if quality is not None:
+        buf = io.BytesIO()
+        image.save(buf, "JPEG", quality=quality)
+        image = Image.open(io.BytesIO(buf.getvalue()))
+    buf = io.BytesIO()
+    image.convert("RGB").save(buf, "PDF", resolution=SOURCE_DPI)
+    return "pdf", buf.getvalue()
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance, one row at a time."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def build_scans(corpus, fonts, variants, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    scans = []
+    for name, text in corpus:
+        for font in fonts:
+            page = typeset(text, font)
+            for variant in variants:
+                kind, content = degrade(page, variant, rng)
+                scans.append({
+                    "name": f"{name}/{os.path.splitext(font)[0]}/{variant}",
+                    "variant": variant,
+                    "reference": normalize(f"{text}\n{text}" if variant == "strip" else text),
+                    "kind": kind,
+                    "content": content,
+                })
+    return scans
+
+
+def run_config(service, profile, preprocess: bool, scans: list[dict]) -> dict:
+    page_preprocess.PAGE_PREPROCESS = preprocess
+
+    def extract(scan: dict) -> str:
+        if scan["kind"] == "pdf":
+            response = service.process_pdf_content(scan["content"], profile)
+        else:
+            response = service.process_image_content(scan["content"], profile)
+        return "\n".join(page["text"] for page in response.structured)
+
+    extract(scans[0])  # Aufwärmen
+
+    errors: dict[str, list[int]] = {v: [0, 0] for v in dict.fromkeys(s["variant"] for s in scans)}
+    seconds = 0.0
+    for scan in scans:
+        start = time.perf_counter()
+        text = extract(scan)
+        seconds += time.perf_counter() - start
+        distance = edit_distance(scan["reference"], normalize(text))
+        errors[scan["variant"]][0] += distance
+        errors[scan["variant"]][1] += len(scan["reference"])
+
+    total = [sum(e[0] for e in errors.values()), sum(e[1] for e in errors.values())]
+    return {
+        "pages_per_sec": round(len(scans) / seconds, 3),
+        "cer": round(total[0] / total[1], 4),
+        "cer_by_variant": {v: round(e[0] / e[1], 4) for v, e in errors.items()},
+    }
+
+
+def compare(results: dict, baseline: dict, max_increase: float) -> bool:
+    """Print CER and speed deltas against a baseline; False if any CER regressed."""
+    ok = True
+    for name, result in results.items():
+        base = baseline.get("configs", {}).get(name)
+        if base is None:
+            continue
+        cer_delta = result["cer"] - base["cer"]
+        speed = result["pages_per_sec"] / base["pages_per_sec"]
+        verdict = "ok"
+        if cer_delta > max_increase:
+            verdict = "CER REGRESSION"
+            ok = False
+        print(f"{name:<18} CER {cer_delta:+.2%}  speed x{speed:.2f}  {verdict}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Verzeichnis mit Referenztexten (.txt)")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="kommagetrennte Profile")
+    parser.add_argument("--preprocess", choices=("on", "off", "both"), default="both",
+                        help="Zuschnitt/Begradigung (page_preprocess)")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="kommagetrennte Verschlechterungen")
+    parser.add_argument("--fonts", default=",".join(DEFAULT_FONTS), help="TrueType-Schriften (Name oder Pfad)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Ergebnis als JSON schreiben")
+    parser.add_argument("--compare", help="frühere --json-Ausgabe als Vergleichsbasis")
+    parser.add_argument("--max-cer-increase", type=float, default=0.005,
+                        help="erlaubter CER-Anstieg gegenüber --compare (absolut, default 0.5 %%)")
+    args = parser.parse_args()
+
+    variants = args.variants.split(",")
+    scans = build_scans(load_corpus(args.corpus), args.fonts.split(","), variants, args.seed)
+    modes = {"on": [True], "off": [False], "both": [True, False]}[args.preprocess]
+
+    # Vor dem Import von main: OCR im Prozess (PAGE_PREPROCESS lässt sich nur
+    # dort umschalten; ohne Worker ist kein Zeitbudget möglich), kein Cache.
+    os.environ["OCR_WORKERS"] = "0"
+    os.environ["PAGE_TIMEOUT_SECONDS"] = "0"
+    os.environ["PAGE_CACHE_MAX_MB"] = "0"
+    os.environ["STARTUP_BENCHMARK"] = "0"
+    import main as service
+
+    service.start_ocr()
+    results = {}
+    print(f"{len(scans)} scans")
+    print(f"{'config':<18} {'pages/s':>8} {'CER':>7} " + " ".join(f"{v:>7}" for v in variants))
+    for profile_name in args.profiles.split(","):
+        profile = PROFILES[profile_name]
+        for preprocess in modes:
+            name = f"{profile.name}+{'pre' if preprocess else 'raw'}"
+            r = results[name] = run_config(service, profile, preprocess, scans)
+            print(
+                f"{name:<18} {r['pages_per_sec']:>8.2f} {r['cer']:>7.2%} "
+                + " ".join(f"{r['cer_by_variant'][v]:>7.2%}" for v in variants)
+            )
+
+    service.stop_ocr()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scans": len(scans), "seed": args.seed, "configs": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_cer_increase):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Durchsatz der Extraktionsprofile messen.
+
+    python -m bench.profile_speed [--pages 3]
+
+Rendert die Beispiel-Arbeitsblattseite aus self_benchmark in der DPI jedes
+Profils, einmal aufrecht und einmal um 180° gedreht (zeigt die Kosten der
+Seitenorientierung), und misst Seiten/s, Zeilen/s sowie den Anteil der
+Beispielzeilen, die wörtlich erkannt wurden. Ergebnisse gehören samt der
+ausgegebenen Hardware-Zeile in die Messwert-Tabelle im README; --markdown
+gibt die Zeilen direkt in deren Format aus.
+"""
+
+import argparse
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr_engine  # noqa: E402
+from profiles import PROFILES  # noqa: E402
+from self_benchmark import SAMPLE_LINES, sample_page  # noqa: E402
+
+
+def measure(engine, profile, pages: int, rotated: bool) -> dict:
+    page = sample_page(profile.dpi)
+    if rotated:
+        page = page.rotate(180)
+    array = ocr_engine.image_to_array(page)
+    ocr_engine.recognize_lines(engine, array, profile)  # Aufwärmen
+
+    start = time.perf_counter()
+    for _ in range(pages):
+        lines = ocr_engine.recognize_lines(engine, array, profile)
+    seconds = time.perf_counter() - start
+
+    expected = {line.strip() for line in SAMPLE_LINES}
+    found = {line.strip() for line in lines} & expected
+    return {
+        "pages_per_sec": pages / seconds,
+        "lines_per_sec": len(lines) * pages / seconds,
+        "exact_lines": len(found) / len(expected),
+    }
+
+
+def hardware() -> str:
+    """CPU model and usable cores, for the README next to the numbers."""
+    model = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{model}, {ocr_engine.available_cpus()} Kerne, PaddleOCR-Threads: {ocr_engine.threads_per_worker(1)}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=3, help="gemessene Seiten pro Profil und Lage")
+    parser.add_argument("--markdown", action="store_true", help="Zeilen für die Messwert-Tabelle im README")
+    args = parser.parse_args()
+
+    engine = ocr_engine.create_engine()
+    print(f"Hardware: {hardware()}")
+    if args.markdown:
+        print("| Profil | Seiten/s aufrecht | Seiten/s 180° | wörtlich aufrecht | wörtlich 180° |")
+        print("|---|---|---|---|---|")
+    else:
+        print(f"{'profile':<10} {'page':<8} {'pages/s':>8} {'lines/s':>8} {'exact':>6}")
+    for profile in PROFILES.values():
+        upright, rotated = (measure(engine, profile, args.pages, r) for r in (False, True))
+        if args.markdown:
+            print(
+                f"| `{profile.name}` | {upright['pages_per_sec']:.2f} | {rotated['pages_per_sec']:.2f} "
+                f"| {upright['exact_lines']:.0%} | {rotated['exact_lines']:.0%} |"
+            )
+            continue
+        for label, r in (("upright", upright), ("180°", rotated)):
+            print(
+                f"{profile.name:<10} {label:<8} "
+                f"{r['pages_per_sec']:>8.2f} {r['lines_per_sec']:>8.1f} {r['exact_lines']:>6.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
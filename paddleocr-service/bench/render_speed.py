@@ -0,0 +1,73 @@
+"""
+PDF-Rendering pro Seite: pdfium (im Prozess) gegen pdftoppm (pdf2image).
+
+    python -m bench.render_speed [--pages 10] [--dpi 200] [datei.pdf ...]
+
+Ohne Dateien werden zwei Beispiele erzeugt: ein Vektor-PDF mit Textlayer
+und ein Scan-PDF (JPEG-Seitenbilder, wie vom Kopierer). Gemessen wird die
+Zeit pro Seite nach einer Aufwärmseite; ein Backend, das hier nicht läuft
+(pypdfium2 oder pdftoppm fehlt), wird übersprungen.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_render  # noqa: E402
+from self_benchmark import sample_page, sample_text_pdf  # noqa: E402
+
+BACKENDS = {"pdfium": pdf_render.PdfiumDocument, "pdftoppm": pdf_render.PopplerDocument}
+
+
+def scan_pdf(pages: int, dpi: int) -> bytes:
+    page = sample_page(dpi).convert("L")
+    buf = io.BytesIO()
+    page.save(buf, "PDF", resolution=dpi, save_all=True, append_images=[page] * (pages - 1), quality=85)
+    return buf.getvalue()
+
+
+def measure(backend, content: bytes, dpi: int) -> dict:
+    start = time.perf_counter()
+    with backend(content) as document:
+        opened = time.perf_counter() - start
+        document.render_page(1, dpi)  # Aufwärmen
+        start = time.perf_counter()
+        for page_number in range(1, document.page_count + 1):
+            document.render_page(page_number, dpi)
+        seconds = time.perf_counter() - start
+        pages = document.page_count
+    return {"open_ms": opened * 1000, "ms_per_page": seconds * 1000 / pages, "pages": pages}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="eigene PDFs statt der Beispiele")
+    parser.add_argument("--pages", type=int, default=10, help="Seiten der Beispiel-PDFs")
+    parser.add_argument("--dpi", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.files:
+        inputs = [(os.path.basename(f), open(f, "rb").read()) for f in args.files]
+    else:
+        inputs = [("vector", sample_text_pdf(args.pages)), ("scan", scan_pdf(args.pages, args.dpi))]
+
+    print(f"{'pdf':<16} {'renderer':<9} {'pages':>5} {'open ms':>8} {'ms/page':>8}")
+    for name, content in inputs:
+        for backend_name, backend in BACKENDS.items():
+            try:
+                r = measure(backend, content, args.dpi)
+            except Exception as e:
+                print(f"{name:<16} {backend_name:<9} skipped: {str(e)}")
+                continue
+            print(
+                f"{name:<16} {backend_name:<9} {r['pages']:>5} "
+                f"{r['open_ms']:>8.1f} {r['ms_per_page']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Aufwandsschätzung vor der Extraktion (POST /estimate).
+
+Ob ein PDF 300 ms (Textlayer) oder drei Minuten (100-Seiten-Scan) braucht,
+weiß der Aufrufer vorher nicht. Die Schätzung liest nur die PDF-Struktur
+(Seitengrößen) und den Textlayer jeder Seite (pdf_render.inspect_pages)
+und rechnet mit Raten, die der Dienst an seinen letzten echten Läufen misst:
+
+- Textlayer: Sekunden pro Seite
+- OCR: Sekunden pro Megapixel bei Profil-DPI, je Profil; gemessen als
+  Wanduhrzeit des ganzen Requests, Parallelität der Worker ist also schon
+  enthalten. Seiten aus dem Seiten-Cache zählen nicht als Megapixel.
+
+Solange für eine Rate noch keine Messungen vorliegen, gilt der
+Start-Benchmark (self_benchmark.py), sonst ein fester Erfahrungswert.
+Die Messungen leben im Prozess; nach einem Neustart beginnt die Kalibrierung
+neu.
+"""
+
+import os
+import statistics
+import threading
+from collections import deque
+from typing import Optional
+
+from pdf_render import PageInfo
+from profiles import ExtractionProfile
+
+# Ohne PDFium (pdfplumber) werden nur so viele Seiten auf einen Textlayer
+# geprüft (gleichmäßig verteilt); PDFium prüft alle Seiten.
+ESTIMATE_TEXT_SAMPLE_PAGES = 20
+
+# Ab so vielen Zeichen gilt eine einzelne Seite als Seite mit Textlayer
+MIN_PAGE_TEXT_CHARS = 20
+
+# Über dieser Schätzung wird der asynchrone Weg (POST /jobs) empfohlen
+ESTIMATE_SYNC_MAX_SECONDS = float(os.getenv("ESTIMATE_SYNC_MAX_SECONDS", "30"))
+
+# Anzahl der letzten Messungen je Rate; der Median glättet Ausreißer
+CALIBRATION_WINDOW = 50
+
+# Erfahrungswerte ohne Messung (ein Kern, balanced-Profil)
+DEFAULT_TEXT_SECONDS_PER_PAGE = 0.05
+DEFAULT_OCR_SECONDS_PER_MEGAPIXEL = 0.7
+
+
+class Calibration:
+    """Recent measured rates (seconds per unit), one window per key."""
+
+    def __init__(self, window: int = CALIBRATION_WINDOW) -> None:
+        self._window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float, units: float) -> None:
+        if units <= 0:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(key, deque(maxlen=self._window))
+            samples.append(seconds / units)
+
+    def rate(self, key: str) -> tuple[Optional[float], int]:
+        """Median rate and sample count; (None, 0) without measurements."""
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if not samples:
+            return None, 0
+        return statistics.median(samples), len(samples)
+
+
+def ocr_key(profile: ExtractionProfile) -> str:
+    return f"ocr:{profile.name}"
+
+
+TEXT_LAYER_KEY = "text-layer"
+
+
+def _text_rate(calibration: Calibration, benchmark: dict) -> tuple[float, int, str]:
+    rate, samples = calibration.rate(TEXT_LAYER_KEY)
+    if rate is not None:
+        return rate, samples, "measured"
+    if benchmark.get("status") == "done":
+        return 1 / benchmark["text_layer_pages_per_sec"], 0, "benchmark"
+    return DEFAULT_TEXT_SECONDS_PER_PAGE, 0, "default"
+
+
+def _ocr_rate(
+    calibration: Calibration, profile: ExtractionProfile, benchmark: dict, parallel: int
+) -> tuple[float, int, str]:
+    rate, samples = calibration.rate(ocr_key(profile))
+    if rate is not None:
+        return rate, samples, "measured"
+    if benchmark.get("status") == "done":
+        # Benchmark: A4-Seiten nacheinander auf einem Worker
+        a4_megapixels = PageInfo(595, 842).megapixels(benchmark["dpi"])
+        return 1 / (benchmark["ocr_pages_per_sec"] * a4_megapixels) / parallel, 0, "benchmark"
+    return DEFAULT_OCR_SECONDS_PER_MEGAPIXEL / parallel, 0, "default"
+
+
+def estimate_pdf(
+    pages: list[PageInfo],
+    profile: ExtractionProfile,
+    calibration: Calibration,
+    benchmark: dict,
+    min_text_layer_chars: int,
+    parallel: int = 1,
+) -> dict:
+    """Predict method and processing time of process_pdf_content for these pages.
+
+    Wie process_pdf_content entscheidet der Textlayer des ganzen Dokuments.
+    Liegt er nur für eine Stichprobe vor (pdfplumber), werden deren Zeichen
+    auf alle Seiten hochgerechnet; has_text_layer ist dann für die übrigen
+    Seiten None."""
+    sampled = [p.text_chars for p in pages if p.text_chars is not None]
+    total_chars = sum(sampled) * len(pages) / len(sampled) if sampled else 0
+    method = "text-layer" if total_chars >= min_text_layer_chars else "ocr"
+
+    if method == "text-layer":
+        rate, samples, source = _text_rate(calibration, benchmark)
+        per_page = [rate for _ in pages]
+    else:
+        rate, samples, source = _ocr_rate(calibration, profile, benchmark, max(1, parallel))
+        per_page = [p.megapixels(profile.dpi) * rate for p in pages]
+
+    seconds = sum(per_page)
+    return {
+        "pages": len(pages),
+        "method": method,
+        "profile": profile.name,
+        "megapixels": round(sum(p.megapixels(profile.dpi) for p in pages), 1),
+        "estimated_seconds": round(seconds, 2),
+        "recommended": "sync" if seconds <= ESTIMATE_SYNC_MAX_SECONDS else "async",
+        "calibration": {
+            "rate": round(rate, 4),
+            "unit": "seconds/page" if method == "text-layer" else "seconds/megapixel",
+            "samples": samples,
+            "source": source,
+        },
+        "page_details": [
+            {
+                "page": number,
+                "width_pt": round(page.width, 1),
+                "height_pt": round(page.height, 1),
+                "megapixels": round(page.megapixels(profile.dpi), 2),
+                "has_text_layer": None if page.text_chars is None
+                else page.text_chars >= MIN_PAGE_TEXT_CHARS,
+                "estimated_seconds": round(page_seconds, 3),
+            }
+            for number, (page, page_seconds) in enumerate(zip(pages, per_page), 1)
+        ],
+    }
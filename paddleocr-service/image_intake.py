@@ -0,0 +1,110 @@
+"""
+Aufnahme hochgeladener Fotos vor der OCR.
+
+Handyfotos von Arbeitsblättern haben 12–50 MP und gingen bisher in voller
+Auflösung in np.array() und die Detektion. Hier wird das Bild
+
+1. bei JPEG direkt verkleinert dekodiert (draft: 1/2, 1/4 oder 1/8 der
+   Auflösung, sodass nie das volle Kamerabild im Speicher liegt),
+2. nach EXIF-Orientierung aufgerichtet,
+3. auf die Textauflösung des Profils verkleinert: Die kurze Seite entspricht
+   einer A4-Breite bei Profil-DPI (plus Rand, weil Fotos Tisch und Ränder
+   mit abbilden). Kleinere Bilder werden nicht vergrößert.
+
+Bleibt das Bild deutlich länger als eine Seite (Doppelseiten, lange
+Screenshots), wird es entlang der langen Seite in überlappende Streifen
+geteilt. Jede erkannte Zeile gehört dem Streifen, in dessen Kernbereich ihr
+Mittelpunkt liegt; Zeilen im Überlapp werden so genau einmal übernommen.
+Die Überlappung (1 Zoll) muss mindestens doppelt so hoch sein wie eine
+Textzeile, damit eine am Streifenrand abgeschnittene Zeile im Nachbarstreifen
+vollständig und im Kern liegt. Zeilen quer über eine Naht (bei
+nebeneinander liegenden Streifen) können in zwei Teilen ankommen.
+"""
+
+import io
+import math
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from profiles import ExtractionProfile
+
+A4_SHORT_INCH = 8.27
+A4_LONG_INCH = 11.69
+
+# Anteil des Fotos, den das Blatt typischerweise ausfüllt
+PHOTO_PAGE_FILL = 0.8
+
+# Ab dieser Länge (in Seitenlängen) wird in Streifen geteilt
+TILE_MIN_PAGES = 1.5
+
+Region = tuple[int, int, int, int]  # x0, y0, x1, y1
+
+
+def target_short_side(profile: ExtractionProfile) -> int:
+    return round(A4_SHORT_INCH * profile.dpi / PHOTO_PAGE_FILL)
+
+
+def open_image(content: bytes, profile: ExtractionProfile) -> Image.Image:
+    """Decode, apply EXIF orientation and downscale an uploaded image to RGB."""
+    image = Image.open(io.BytesIO(content))
+    short = target_short_side(profile)
+    # Nur JPEG: Der Decoder wählt die kleinste DCT-Skalierung, bei der beide
+    # Kanten noch >= short sind; die kurze Seite bleibt also >= Ziel.
+    image.draft("RGB", (short, short))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    scale = short / min(image.size)
+    if scale < 1:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    return image
+
+
+def tile_regions(width: int, height: int, profile: ExtractionProfile) -> list[Region]:
+    """Overlapping strips along the long side; one region if the image is page-sized."""
+    long_side = max(width, height)
+    tile = round(A4_LONG_INCH * profile.dpi / PHOTO_PAGE_FILL)
+    if long_side <= tile * TILE_MIN_PAGES:
+        return [(0, 0, width, height)]
+
+    overlap = profile.dpi
+    count = math.ceil((long_side - overlap) / (tile - overlap))
+    step = (long_side - tile) / (count - 1)
+    starts = [round(i * step) for i in range(count)]
+    if width >= height:
+        return [(s, 0, s + tile, height) for s in starts]
+    return [(0, s, width, s + tile) for s in starts]
+
+
+def crop(array: np.ndarray, region: Optional[Region]) -> np.ndarray:
+    """Contiguous copy of a region (None = the whole array, no copy)."""
+    if region is None:
+        return array
+    x0, y0, x1, y1 = region
+    return np.ascontiguousarray(array[y0:y1, x0:x1])
+
+
+def merge_tiles(regions: list[Region], results: list[list[tuple[list, str]]]) -> list[str]:
+    """Join per-strip lines (boxes in strip coordinates) without seam duplicates.
+
+    Jeder Streifen besitzt den Bereich von der Mitte des Überlapps zum
+    Vorgänger bis zur Mitte des Überlapps zum Nachfolger."""
+    if len(regions) == 1:
+        return [text for _, text in results[0]]
+
+    axis = 0 if regions[0][1] == regions[1][1] else 1  # 0: Streifen nebeneinander
+    lines = []
+    for i, (region, result) in enumerate(zip(regions, results)):
+        start, end = region[axis], region[axis + 2]
+        lo = (start + regions[i - 1][axis + 2]) / 2 if i > 0 else -math.inf
+        hi = (end + regions[i + 1][axis]) / 2 if i + 1 < len(regions) else math.inf
+        for box, text in result:
+            coords = [point[axis] for point in box]
+            center = start + (min(coords) + max(coords)) / 2
+            if lo <= center < hi:
+                lines.append(text)
+    return lines
@@ -0,0 +1,235 @@
+"""
+Dauerhafte Job-Queue für den Worker-Modus.
+
+Die API legt Extraktionsaufträge in die Queue (POST /jobs), beliebig viele
+`python worker.py`-Prozesse oder Container holen sie ab und schreiben das
+Ergebnis zurück (GET /jobs/{id}). Standard-Backend ist SQLite im WAL-Modus;
+über JOB_QUEUE_BACKEND="paket.modul:Klasse" lässt sich eine Netzwerk-Queue
+einhängen, die JobQueue implementiert.
+
+Claims sind Leases: stirbt ein Worker (Neustart, OOM), läuft seine Lease ab
+und ein anderer Worker übernimmt den Job — bis JOB_MAX_ATTEMPTS erreicht ist.
+"""
+
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+# Kein Default: unter /tmp ginge die Queue samt Ergebnissen bei jedem
+# Redeploy verloren. Die Datei gehört auf ein Volume, das API und Worker sehen.
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    filename: str
+    payload: bytes
+    params: dict
+    attempts: int
+
+
+class JobQueue(ABC):
+    """Interface every queue backend implements."""
+
+    @abstractmethod
+    def enqueue(self, kind: str, filename: str, payload: bytes, params: Optional[dict] = None) -> str:
+        """Store a new job and return its id."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """Atomically take the oldest queued (or lease-expired) job."""
+
+    @abstractmethod
+    def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Heartbeat; False if the job no longer belongs to this worker."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: dict) -> None:
+        """Store the result; drops the input payload."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str, status_code: int = 500) -> None:
+        """Mark the job as permanently failed."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """Status view for the API (without the input payload)."""
+
+    @abstractmethod
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs older than the given age."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class SQLiteJobQueue(JobQueue):
+    """SQLite/WAL backend; works for several processes sharing one volume."""
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, max_attempts: int = JOB_MAX_ATTEMPTS) -> None:
+        if not path:
+            raise RuntimeError(
+                "JOB_QUEUE_PATH is not set: point it at a file on a persistent volume "
+                "shared by the API and all workers (e.g. /jobs/jobs.db)"
+            )
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                params TEXT NOT NULL,
+                payload BLOB,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT,
+                status_code INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, created_at);
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind, filename, payload, params=None):
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, filename, params, payload, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+            (job_id, kind, filename, json.dumps(params or {}), payload, time.time()),
+        )
+        return job_id
+
+    def claim(self, worker_id, lease_seconds):
+        conn = self._conn()
+        now = time.time()
+        # BEGIN IMMEDIATE nimmt die Schreibsperre sofort: zwei Worker können
+        # nicht denselben Job auswählen.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs, deren Worker zu oft gestorben ist, nicht endlos wiederholen.
+            conn.execute(
+                "UPDATE jobs SET status='failed', error='worker lost too often', "
+                "status_code=500, finished_at=?, payload=NULL "
+                "WHERE status='running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, kind, filename, payload, params, attempts FROM jobs "
+                "WHERE status='queued' OR (status='running' AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status='running', worker=?, lease_until=?, attempts=attempts+1 "
+                "WHERE id=?",
+                (worker_id, now + lease_seconds, row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return Job(
+            id=row[0], kind=row[1], filename=row[2], payload=row[3],
+            params=json.loads(row[4]), attempts=row[5] + 1,
+        )
+
+    def extend_lease(self, job_id, worker_id, lease_seconds):
+        cur = self._conn().execute(
+            "UPDATE jobs SET lease_until=? WHERE id=? AND worker=? AND status='running'",
+            (time.time() + lease_seconds, job_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def _finish(self, job_id, worker_id, status, result, error, status_code):
+        self._conn().execute(
+            "UPDATE jobs SET status=?, result=?, error=?, status_code=?, finished_at=?, "
+            "payload=NULL, lease_until=NULL WHERE id=? AND worker=? AND status='running'",
+            (status, result, error, status_code, time.time(), job_id, worker_id),
+        )
+
+    def complete(self, job_id, worker_id, result):
+        self._finish(job_id, worker_id, "done", json.dumps(result), None, 200)
+
+    def fail(self, job_id, worker_id, error, status_code=500):
+        self._finish(job_id, worker_id, "failed", None, error, status_code)
+
+    def get(self, job_id):
+        row = self._conn().execute(
+            "SELECT id, kind, filename, status, attempts, created_at, finished_at, "
+            "result, error, status_code FROM jobs WHERE id=?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row[0],
+            "kind": row[1],
+            "filename": row[2],
+            "status": row[3],
+            "attempts": row[4],
+            "created_at": row[5],
+            "finished_at": row[6],
+        }
+        if row[7] is not None:
+            job["result"] = json.loads(row[7])
+        if row[8] is not None:
+            job["error"] = row[8]
+            job["status_code"] = row[9]
+        return job
+
+    def purge(self, older_than_seconds):
+        cur = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - older_than_seconds,),
+        )
+        return cur.rowcount
+
+    def stats(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+def load_queue(backend: str = JOB_QUEUE_BACKEND) -> JobQueue:
+    """"sqlite" oder "paket.modul:Klasse" einer eigenen JobQueue-Implementierung."""
+    if backend == "sqlite":
+        return SQLiteJobQueue()
+    module_name, _, class_name = backend.partition(":")
+    if not class_name:
+        raise ValueError(f"JOB_QUEUE_BACKEND must be 'sqlite' or 'module:Class', got {backend!r}")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    queue = cls()
+    if not isinstance(queue, JobQueue):
+        raise TypeError(f"{backend} is not a JobQueue")
+    return queue
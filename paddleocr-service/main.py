@@ -6,22 +6,63 @@ DOCX/PPTX/XLSX), PaddleOCR as fallback for scans and images.
 
 import os
 import base64
+import contextvars
 import io
-import numpy as np
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
 from PIL import Image
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from paddleocr import PaddleOCR
-from pdf2image import convert_from_bytes
 from markitdown import MarkItDown, StreamInfo
 
+import estimate
+import image_intake
+import job_queue
+import ocr_engine
+import ocr_pool
+import office_stream
+import page_cache
+import page_preprocess
+import pdf_render
+import profiling
+import profiles
+import self_benchmark
+from pdf_render import PdfDocument, open_document
+from profiles import ExtractionProfile, ProfileName
+from shared_pages import SharedPage
+from ocr_engine import OCR_LANGUAGE
+
 # Configuration
-OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "german")
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB max
 
+# OCR laeuft in supervised Kindprozessen (siehe ocr_pool.py), die nach
+# OCR_WORKER_MAX_JOBS Auftraegen oder ueber OCR_WORKER_MAX_RSS_MB ersetzt
+# werden. OCR_WORKERS=0 fuehrt OCR wie frueher im API-Prozess aus.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "1"))
+OCR_WORKER_MAX_JOBS = int(os.getenv("OCR_WORKER_MAX_JOBS", "200"))
+OCR_WORKER_MAX_RSS_MB = int(os.getenv("OCR_WORKER_MAX_RSS_MB", "1500"))
+# Modelle einmal laden und Worker davon forken (copy-on-write), siehe ocr_pool.py
+OCR_PRELOAD = os.getenv("OCR_PRELOAD", "0") == "1"
+
+# Scans werden seitenweise gerendert, waehrend vorherige Seiten schon in der
+# OCR sind. Die Queue dazwischen haelt hoechstens so viele fertige Seiten.
+# Die Render-DPI kommt aus dem Extraktionsprofil (profiles.py).
+OCR_PIPELINE_DEPTH = int(os.getenv("OCR_PIPELINE_DEPTH", "2"))
+
+# Zeitbudget je Seite und Stufe (Rendern, OCR); 0 = unbegrenzt. Die OCR laesst
+# sich nur in Worker-Prozessen (OCR_WORKERS >= 1) abbrechen; OCR_WORKERS=0
+# verlangt daher PAGE_TIMEOUT_SECONDS=0 (siehe start_ocr).
+PAGE_TIMEOUT_SECONDS = float(os.getenv("PAGE_TIMEOUT_SECONDS", "60")) or None
+
 # Unter dieser Zeichenzahl gilt ein PDF-Textlayer als leer (Scan) → OCR.
 # Digitale Arbeitsblätter liegen deutlich darüber; Scans liefern ~0.
 MIN_TEXT_LAYER_CHARS = 200
@@ -30,6 +71,9 @@ MIN_TEXT_LAYER_CHARS = 200
 # in requirements.txt dazu passen).
 DOC_EXTENSIONS = {".docx", ".pptx", ".xlsx"}
 
+# Antworten ab dieser Groesse werden komprimiert (brotli/gzip).
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "4096"))
+
 # Server-zu-Server-API-Key. Wird vom Convex-Backend als X-API-Key-Header
 # gesendet. Ohne gesetzten Key laeuft der Dienst offen (nur fuer lokale Tests).
 API_KEY = os.getenv("PADDLEOCR_API_KEY")
@@ -54,11 +98,82 @@ ALLOWED_ORIGINS = [
     if o.strip()
 ]
 
+# In-Process-Engine (OCR_WORKERS=0) bzw. Worker-Pool; beides wird erst beim
+# Start der App erzeugt, damit Worker-Kindprozesse main.py nicht mitladen.
+ocr = None
+pool: Optional[ocr_pool.OCRWorkerPool] = None
+# Die In-Process-Engine ist nicht threadsicher (ocr_engine.configure stellt
+# den Predictor pro Aufruf um): parallele Requests, worker.py --concurrency
+# und der Selbst-Benchmark nutzen sie nur unter dieser Sperre.
+ocr_lock = threading.Lock()
+
+# Seiten-Cache (siehe page_cache.py). Alles, was das Ergebnis fuer dasselbe
+# Seitenbild veraendert, gehoert in den Schluessel.
+ocr_cache: Optional[page_cache.PageCache] = None
+OCR_CACHE_CONFIG = (
+    f"{OCR_LANGUAGE}:{ocr_engine.MIN_CONFIDENCE}:{page_preprocess.PAGE_PREPROCESS}:{ocr_engine.OCR_MKLDNN}"
+)
+
+
+def start_ocr() -> None:
+    """Load the OCR engine or start the worker pool (API startup and worker.py)."""
+    global ocr, pool, ocr_cache
+    ocr_cache = page_cache.create_cache()
+    if OCR_WORKERS > 0:
+        pool = ocr_pool.create_pool(
+            OCR_WORKERS, OCR_WORKER_MAX_JOBS, OCR_WORKER_MAX_RSS_MB, preload=OCR_PRELOAD
+        )
+        print(f"OCR pool: {pool.size} workers ({'preload' if OCR_PRELOAD else 'spawn'}), {pool.cpu_threads} threads each")
+    else:
+        if PAGE_TIMEOUT_SECONDS:
+            # Ein stilles "Budget nur fürs Rendern" wäre eine falsche Zusage.
+            raise RuntimeError(
+                "OCR_WORKERS=0 cannot enforce PAGE_TIMEOUT_SECONDS (in-process OCR cannot be "
+                "interrupted): set OCR_WORKERS >= 1 or PAGE_TIMEOUT_SECONDS=0"
+            )
+        ocr = ocr_engine.create_engine()
+
+
+def stop_ocr() -> None:
+    if pool is not None:
+        pool.shutdown()
+
+
+startup_benchmark = self_benchmark.SelfBenchmark()
+
+# Zuletzt gemessene Raten fuer POST /estimate (siehe estimate.py)
+calibration = estimate.Calibration()
+
+
+def _benchmark_text_layer(content: bytes) -> str:
+    text = extract_pdf_text_layer(content)
+    if text is None:
+        raise RuntimeError("sample PDF produced no text layer")
+    return text
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_ocr()
+    if self_benchmark.STARTUP_BENCHMARK:
+        # Derselbe Weg wie ein Request (recognize_image -> _recognize_region):
+        # mit OCR_WORKERS=0 nimmt der Benchmark-Thread also ocr_lock und
+        # läuft nie gleichzeitig mit einem Request auf der Engine.
+        startup_benchmark.start(
+            lambda image: recognize_image(image, profiles.get_profile(None), use_cache=False),
+            _benchmark_text_layer,
+            dpi=profiles.get_profile(None).dpi,
+        )
+    yield
+    stop_ocr()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="Document Extraction Service",
     description="Document/OCR service for Meoluna learning platform",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware - restrict to Meoluna domains
@@ -70,60 +185,76 @@ app.add_middleware(
     allow_headers=["Content-Type", "X-API-Key"],
 )
 
-# Initialize PaddleOCR with language support
-# Models are downloaded on first use or during Docker build
-ocr = PaddleOCR(
-    use_angle_cls=True,
-    lang=OCR_LANGUAGE,
-    show_log=False,
-    use_gpu=False
-)
+# Grosse Antworten komprimieren: brotli, wenn brotli-asgi installiert ist
+# (mit gzip-Fallback fuer Clients ohne br), sonst gzip.
+try:
+    from brotli_asgi import BrotliMiddleware
+
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
+
+@app.middleware("http")
+async def profile_middleware(request: Request, call_next):
+    """Profile this request when X-Profile carries the profiling key (see profiling.py)."""
+    if not profiling.is_authorized(request.headers.get("x-profile")):
+        return await call_next(request)
+
+    with profiling.profile_request(f"{request.method} {request.url.path}") as profile:
+        response = await call_next(request)
+    if profile is None:
+        response.headers["X-Profile-Status"] = "busy"
+        return response
+
+    profile.save()
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["Server-Timing"] = profile.server_timing()
+    return response
 
 # markitdown-Konverter für digitale Dokumente (kein LLM, keine Plugins)
 md_converter = MarkItDown(enable_plugins=False)
 
 
+# Jede Seite steht sonst doppelt in der Antwort (markdown und structured[*].text).
+# "markdown"/"structured" liefern nur eine Darstellung, "both" (default) wie bisher.
+ResponseView = Literal["markdown", "structured", "both"]
+
+
 class Base64Request(BaseModel):
     """Request model for base64-encoded PDF"""
     pdf: str
     language: Optional[str] = None
+    view: ResponseView = "both"
+    profile: Optional[ProfileName] = None
 
 
 class OCRResponse(BaseModel):
     """Response model for OCR results"""
     success: bool
     pages: int
-    markdown: str
-    structured: list
-    # "text-layer" (digitales PDF), "ocr" (Scan) oder "markitdown" (Office).
+    # Je nach view kann eine der beiden Darstellungen fehlen.
+    markdown: Optional[str] = None
+    structured: Optional[list] = None
+    # "text-layer" (digitales PDF), "ocr" (Scan), "office" (Office, pro
+    # Folie/Blatt/Abschnitt) oder "markitdown" (Office, Rückfall).
     # Optional, damit bestehende Clients unverändert weiterlaufen.
     method: Optional[str] = None
 
 
-def extract_text_from_image(image: Image.Image) -> list[str]:
+def project_response(response: OCRResponse, view: str) -> OCRResponse:
+    """Drop the text representation the caller did not ask for"""
+    if view == "markdown":
+        response.structured = None
+    elif view == "structured":
+        response.markdown = None
+    return response
+
+
+def extract_text_from_image(image: Image.Image, profile: ExtractionProfile) -> list[str]:
     """Extract text from a single image using PaddleOCR"""
     try:
-        # Convert PIL Image to numpy array (ensure RGB)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        img_array = np.array(image)
-
-        # Run OCR with angle classification
-        result = ocr.ocr(img_array, cls=True)
-
-        # Extract text lines
-        lines = []
-        if result is None or not result[0]:
-            return lines
-
-        for line in result[0]:
-            if line and len(line) > 1:
-                text = line[1][0]  # Get the text content
-                confidence = line[1][1]  # Get confidence score
-                if confidence > 0.5:  # Filter low-confidence results
-                    lines.append(text)
-
-        return lines
+        return recognize_image(image, profile)
     except Exception as e:
         print(f"OCR error: {str(e)}")
         return []
@@ -135,9 +266,10 @@ def extract_pdf_text_layer(content: bytes) -> Optional[str]:
     Returns None when the PDF has no usable text layer (scan) so the caller
     falls back to OCR."""
     try:
-        result = md_converter.convert_stream(
-            io.BytesIO(content), stream_info=StreamInfo(extension=".pdf")
-        )
+        with profiling.stage("text-layer"):
+            result = md_converter.convert_stream(
+                io.BytesIO(content), stream_info=StreamInfo(extension=".pdf")
+            )
         text = (result.text_content or "").strip()
     except Exception as e:
         print(f"markitdown PDF error: {str(e)}")
@@ -159,11 +291,195 @@ def count_pdf_pages(content: bytes) -> int:
         return 1
 
 
-def process_pdf_content(content: bytes) -> OCRResponse:
+class RenderError(Exception):
+    """Eine Seite konnte nicht gerastert werden."""
+
+
+def recognize_image(image: Image.Image, profile: ExtractionProfile, use_cache: bool = True) -> list[str]:
+    """OCR a PIL image via the worker pool or in-process engine; raises on errors."""
+    if pool is not None:
+        # Einmal ins Shared Memory schreiben; der Worker liest ohne Kopie.
+        with SharedPage.from_image(image) as page:
+            return _recognize_page(page, profile, use_cache)
+    return _recognize_page(image, profile, use_cache)
+
+
+def _recognize_page(page, profile: ExtractionProfile, use_cache: bool = True) -> list[str]:
+    """OCR one rendered page (SharedPage with pool, PIL image in-process); raises on errors.
+
+    Der Seiten-Cache wird vor Detektion und Erkennung gefragt. Überlange
+    Bilder werden in Streifen erkannt (image_intake.tile_regions)."""
+    return _recognize_page_cached(page, profile, use_cache)[0]
+
+
+def _recognize_page_cached(page, profile: ExtractionProfile, use_cache: bool = True) -> tuple[list[str], bool]:
+    """Like _recognize_page, plus whether the lines came from the page cache."""
+    array = page.array if isinstance(page, SharedPage) else ocr_engine.image_to_array(page)
+
+    key = None
+    if ocr_cache is not None and use_cache:
+        with profiling.stage("page-cache"):
+            key = page_cache.page_key(array, f"{OCR_CACHE_CONFIG}:{profile.name}")
+            cached = ocr_cache.get(key)
+        if cached is not None:
+            return cached, True
+
+    regions = image_intake.tile_regions(array.shape[1], array.shape[0], profile)
+    with profiling.stage("ocr"):
+        if len(regions) == 1:
+            results = [_recognize_region(page, array, profile, None)]
+        elif isinstance(page, SharedPage) and pool.size > 1:
+            # Streifen parallel auf die Worker verteilen (gleiche SharedPage)
+            with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                results = list(executor.map(
+                    lambda region: _recognize_region(page, array, profile, region), regions
+                ))
+        else:
+            results = [_recognize_region(page, array, profile, region) for region in regions]
+        lines = image_intake.merge_tiles(regions, results)
+
+    if key is not None:
+        ocr_cache.put(key, lines)
+    return lines, False
+
+
+def _recognize_region(page, array, profile: ExtractionProfile, region) -> list[tuple[list, str]]:
+    """(box, text) lines of one region (None = whole page), boxes relative to the region."""
+    if isinstance(page, SharedPage):
+        return pool.recognize(page, profile, region, timeout=PAGE_TIMEOUT_SECONDS)
+    with ocr_lock:
+        return ocr_engine.recognize(ocr, image_intake.crop(array, region), profile)
+
+
+def _put_unless_stopped(pages: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _render_pages(
+    document: PdfDocument,
+    profile: ExtractionProfile,
+    pages: queue.Queue,
+    stop: threading.Event,
+    pixels: list[int],
+) -> None:
+    """Producer: rasterize page by page into the bounded queue.
+
+    put() blockiert, solange die Queue voll ist (Backpressure) — es liegen nie
+    mehr als OCR_PIPELINE_DEPTH fertig gerenderte Seiten im Speicher."""
+    with profiling.profile_thread():
+        _render_pages_into(document, profile, pages, stop, pixels)
+
+
+def _render_pages_into(
+    document: PdfDocument,
+    profile: ExtractionProfile,
+    pages: queue.Queue,
+    stop: threading.Event,
+    pixels: list[int],
+) -> None:
+    for page_num in range(1, document.page_count + 1):
+        if stop.is_set():
+            return
+        try:
+            with profiling.stage("render"):
+                if pool is not None:
+                    # Direkt in Shared Memory (PDFium mit Zeitbudget: aus dem Render-Prozess)
+                    item = document.render_shared(page_num, dpi=profile.dpi, timeout=PAGE_TIMEOUT_SECONDS)
+                    pixels[page_num - 1] = item.array.shape[0] * item.array.shape[1]
+                else:
+                    item = document.render_page(page_num, dpi=profile.dpi, timeout=PAGE_TIMEOUT_SECONDS)
+                    pixels[page_num - 1] = item.width * item.height
+        except TimeoutError as e:
+            item = e  # Zeitbudget überschritten: Fehler der Seite, kein kaputtes PDF
+        except Exception as e:
+            item = RenderError(str(e))
+        if not _put_unless_stopped(pages, (page_num, item), stop):
+            if isinstance(item, SharedPage):
+                item.release()
+            return
+    _put_unless_stopped(pages, None, stop)
+
+
+def run_ocr_pipeline(
+    document: PdfDocument, profile: ExtractionProfile, pixels: Optional[list[int]] = None
+) -> list:
+    """Render and OCR all pages with overlap; returns per page lines or an Exception.
+
+    Waehrend Seite N erkannt wird, rendert der Producer schon Seite N+1. Mit
+    Worker-Pool laufen so viele Verbraucher wie OCR-Worker, sonst einer.
+    pixels (optional, eine Zahl pro Seite) erhaelt die Pixelzahl jeder
+    tatsaechlich erkannten Seite; Treffer im Seiten-Cache bleiben 0."""
+    pages: queue.Queue = queue.Queue(maxsize=OCR_PIPELINE_DEPTH)
+    stop = threading.Event()
+    results: list = [None] * document.page_count
+    if pixels is None:
+        pixels = [0] * document.page_count
+
+    def consume() -> None:
+        with profiling.profile_thread():
+            _consume()
+
+    def _consume() -> None:
+        while True:
+            item = pages.get()
+            if item is None:
+                pages.put(None)  # Sentinel fuer die uebrigen Verbraucher
+                return
+            page_num, page = item
+            if isinstance(page, Exception):  # RenderError oder RenderTimeout
+                results[page_num - 1] = page
+                continue
+            try:
+                results[page_num - 1], cached = _recognize_page_cached(page, profile)
+                if cached:
+                    pixels[page_num - 1] = 0
+            except Exception as e:
+                results[page_num - 1] = e
+            finally:
+                if isinstance(page, SharedPage):
+                    page.release()
+
+    # Jeder Thread bekommt eine Kopie des Request-Kontexts, damit ein aktives
+    # Profil (profiling.py) auch Rendern und OCR-Verbraucher erfasst.
+    producer = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(_render_pages, document, profile, pages, stop, pixels),
+        daemon=True,
+    )
+    consumers = [
+        threading.Thread(target=contextvars.copy_context().run, args=(consume,), daemon=True)
+        for _ in range(max(1, OCR_WORKERS))
+    ]
+    producer.start()
+    for consumer in consumers:
+        consumer.start()
+    try:
+        for consumer in consumers:
+            consumer.join()
+    finally:
+        stop.set()
+        producer.join()
+        # Nach einem Abbruch liegengebliebene Seiten freigeben.
+        while not pages.empty():
+            item = pages.get_nowait()
+            if item is not None and isinstance(item[1], SharedPage):
+                item[1].release()
+    return results
+
+
+def process_pdf_content(content: bytes, profile: ExtractionProfile) -> OCRResponse:
     """Process PDF content: digital text layer first, OCR fallback for scans"""
+    started = time.perf_counter()
     text_layer = extract_pdf_text_layer(content)
     if text_layer is not None:
         pages = count_pdf_pages(content)
+        calibration.record(estimate.TEXT_LAYER_KEY, time.perf_counter() - started, pages)
         return OCRResponse(
             success=True,
             pages=pages,
@@ -177,8 +493,7 @@ def process_pdf_content(content: bytes) -> OCRResponse:
         )
 
     try:
-        # Convert PDF to images (200 DPI for good quality)
-        images = convert_from_bytes(content, dpi=200)
+        document = open_document(content)
     except Exception as e:
         print(f"PDF conversion error: {str(e)}")
         raise HTTPException(
@@ -186,68 +501,215 @@ def process_pdf_content(content: bytes) -> OCRResponse:
             detail=f"Failed to process PDF: {str(e)}"
         )
 
-    if not images:
+    with document:
+        if document.page_count < 1:
+            raise HTTPException(
+                status_code=400,
+                detail="No pages found in PDF"
+            )
+        pixels = [0] * document.page_count
+        results = run_ocr_pipeline(document, profile, pixels)
+
+    # Konnte keine einzige Seite gerendert werden, ist das PDF kaputt (wie bisher 400).
+    render_errors = [r for r in results if isinstance(r, RenderError)]
+    if len(render_errors) == len(results):
+        print(f"PDF conversion error: {render_errors[0]}")
         raise HTTPException(
             status_code=400,
-            detail="No pages found in PDF"
+            detail=f"Failed to process PDF: {render_errors[0]}"
         )
+    # Gemessene Wanduhrzeit inkl. Textlayer-Versuch kalibriert POST /estimate;
+    # Seiten aus dem Cache zählen nicht (bei reinem Cache-Treffer keine Messung)
+    calibration.record(estimate.ocr_key(profile), time.perf_counter() - started, sum(pixels) / 1e6)
 
     all_pages = []
     markdown_parts = []
 
-    for page_num, image in enumerate(images, 1):
-        try:
-            # Extract text from this page
-            lines = extract_text_from_image(image)
-            page_text = "\n".join(lines)
-
-            # Store structured data
-            all_pages.append({
-                "page": page_num,
-                "text": page_text,
-                "line_count": len(lines)
-            })
-
-            # Build markdown (AI-optimized format)
-            markdown_parts.append(f"## Seite {page_num}\n\n{page_text}")
-        except Exception as e:
-            print(f"Error processing page {page_num}: {str(e)}")
+    for page_num, result in enumerate(results, 1):
+        if isinstance(result, Exception):
+            print(f"Error processing page {page_num}: {str(result)}")
             all_pages.append({
                 "page": page_num,
                 "text": "",
                 "line_count": 0,
-                "error": str(e)
+                "error": str(result)
             })
             markdown_parts.append(f"## Seite {page_num}\n\n[Fehler bei der Verarbeitung]")
+            continue
+
+        page_text = "\n".join(result)
+
+        # Store structured data
+        all_pages.append({
+            "page": page_num,
+            "text": page_text,
+            "line_count": len(result)
+        })
+
+        # Build markdown (AI-optimized format)
+        markdown_parts.append(f"## Seite {page_num}\n\n{page_text}")
 
     # Combine all pages
     full_markdown = "\n\n---\n\n".join(markdown_parts)
 
     return OCRResponse(
         success=True,
-        pages=len(images),
+        pages=len(results),
         markdown=full_markdown,
         structured=all_pages,
         method="ocr",
     )
 
 
+# Markdown-Überschrift je Einheit, analog zu "## Seite N" bei PDFs
+OFFICE_UNIT_LABELS = {"slide": "Folie", "sheet": "Tabelle", "section": "Abschnitt"}
+
+
+def process_document_content(content: bytes, ext: str) -> OCRResponse:
+    """Extract an Office document (DOCX/PPTX/XLSX) unit by unit, markitdown as fallback"""
+    if office_stream.OFFICE_STREAMING:
+        try:
+            with profiling.stage("office"):
+                response = _process_office_units(content, ext)
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Office streaming error, falling back to markitdown: {str(e)}")
+        else:
+            return response
+
+    try:
+        with profiling.stage("markitdown"):
+            result = md_converter.convert_stream(
+                io.BytesIO(content), stream_info=StreamInfo(extension=ext)
+            )
+        text = (result.text_content or "").strip()
+    except Exception as e:
+        print(f"markitdown document error: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to process document: {str(e)}"
+        )
+
+    if not text:
+        raise HTTPException(
+            status_code=422,
+            detail="No text found in document"
+        )
+
+    return OCRResponse(
+        success=True,
+        pages=1,
+        markdown=text,
+        structured=[{"page": 1, "text": text, "line_count": text.count("\n") + 1}],
+        method="markitdown",
+    )
+
+
+def _process_office_units(content: bytes, ext: str) -> OCRResponse:
+    """One structured entry per slide, sheet or section (see office_stream.py)."""
+    all_pages = []
+    markdown_parts = []
+    for number, unit in enumerate(office_stream.iter_units(content, ext), 1):
+        entry = {
+            "page": number,
+            "kind": unit.kind,
+            "text": unit.text,
+            "line_count": unit.text.count("\n") + 1 if unit.text else 0,
+        }
+        heading = f"## {OFFICE_UNIT_LABELS[unit.kind]} {number}"
+        if unit.title:
+            entry["title"] = unit.title
+            heading += f": {unit.title}"
+        if unit.truncated:
+            entry["truncated"] = True
+        all_pages.append(entry)
+        markdown_parts.append(f"{heading}\n\n{unit.text}" if unit.text else heading)
+
+    if not any(entry["text"] or entry.get("title") for entry in all_pages):
+        raise HTTPException(
+            status_code=422,
+            detail="No text found in document"
+        )
+
+    return OCRResponse(
+        success=True,
+        pages=len(all_pages),
+        markdown="\n\n---\n\n".join(markdown_parts),
+        structured=all_pages,
+        method="office",
+    )
+
+
+def process_image_content(content: bytes, profile: ExtractionProfile) -> OCRResponse:
+    """OCR a single uploaded image (EXIF-oriented and downscaled, see image_intake)"""
+    try:
+        with profiling.stage("intake"):
+            image = image_intake.open_image(content, profile)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid image file: {str(e)}"
+        )
+
+    lines = extract_text_from_image(image, profile)
+    text = "\n".join(lines)
+
+    return OCRResponse(
+        success=True,
+        pages=1,
+        markdown=text,
+        structured=[{"page": 1, "text": text, "line_count": len(lines)}],
+        method="ocr",
+    )
+
+
+async def run_blocking(func, *args):
+    """Run a blocking extraction in the threadpool instead of on the event loop.
+
+    So verteilen sich gleichzeitige Requests auf die OCR-Worker, und /health
+    antwortet auch während langer Extraktionen. Der Request-Kontext wird
+    mitgegeben, damit ein aktives Profil (profiling.py) den Thread erfasst."""
+    def run():
+        with profiling.profile_thread():
+            return func(*args)
+
+    return await run_in_threadpool(contextvars.copy_context().run, run)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
+    health = {
         "status": "ok",
         "service": "paddleocr",
-        "language": OCR_LANGUAGE
+        "language": OCR_LANGUAGE,
+        "profile": profiles.DEFAULT_PROFILE,
+        "pdf_renderer": pdf_render.PDF_RENDERER,
+        "benchmark": startup_benchmark.result(),
     }
-
-
-@app.post("/extract-pdf", response_model=OCRResponse)
-async def extract_pdf(file: UploadFile = File(...), _auth: bool = Depends(require_api_key)):
+    if pool is not None:
+        health["ocr_workers"] = pool.stats()
+    if ocr_cache is not None:
+        health["page_cache"] = ocr_cache.stats()
+    if _job_queue is not None:
+        health["jobs"] = _job_queue.stats()
+    return health
+
+
+@app.post("/extract-pdf", response_model=OCRResponse, response_model_exclude_none=True)
+async def extract_pdf(
+    file: UploadFile = File(...),
+    view: ResponseView = "both",
+    profile: Optional[ProfileName] = None,
+    _auth: bool = Depends(require_api_key),
+):
     """
     Extract text from uploaded PDF file
 
     - **file**: PDF file to process (max 50MB)
+    - **view**: `markdown`, `structured` or `both` (default)
+    - **profile**: `fast`, `balanced`, `accurate` or `detail` (default: OCR_PROFILE)
 
     Returns extracted text in markdown format optimized for AI processing
     """
@@ -268,16 +730,72 @@ async def extract_pdf(file: UploadFile = File(...), _auth: bool = Depends(requir
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
-    return process_pdf_content(content)
+    response = await run_blocking(process_pdf_content, content, profiles.get_profile(profile))
+    return project_response(response, view)
+
+
+@app.post("/estimate")
+async def estimate_pdf(
+    file: UploadFile = File(...),
+    profile: Optional[ProfileName] = None,
+    _auth: bool = Depends(require_api_key),
+):
+    """
+    Predict method and processing time of a PDF without extracting it
+
+    - **file**: PDF file (max 50MB)
+    - **profile**: profile the extraction would use (default: OCR_PROFILE)
+
+    Reads only page sizes and a text-layer sample. Returns page count,
+    per-page text-layer presence and pixel area, the predicted seconds and
+    `recommended`: `sync` (/extract-pdf) or `async` (POST /jobs)
+    """
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF files are supported"
+        )
+
+    content = await file.read()
+    if len(content) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+        )
+
+    try:
+        pages = await run_blocking(pdf_render.inspect_pages, content, estimate.ESTIMATE_TEXT_SAMPLE_PAGES)
+    except Exception as e:
+        print(f"PDF inspection error: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to process PDF: {str(e)}"
+        )
+    if not pages:
+        raise HTTPException(
+            status_code=400,
+            detail="No pages found in PDF"
+        )
+
+    return estimate.estimate_pdf(
+        pages,
+        profiles.get_profile(profile),
+        calibration,
+        startup_benchmark.result(),
+        MIN_TEXT_LAYER_CHARS,
+        parallel=max(1, OCR_WORKERS),
+    )
 
 
-@app.post("/extract-base64", response_model=OCRResponse)
+@app.post("/extract-base64", response_model=OCRResponse, response_model_exclude_none=True)
 async def extract_base64(request: Base64Request, _auth: bool = Depends(require_api_key)):
     """
     Extract text from base64-encoded PDF
 
     - **pdf**: Base64-encoded PDF content
     - **language**: Optional language override (default: german)
+    - **view**: `markdown`, `structured` or `both` (default)
+    - **profile**: `fast`, `balanced`, `accurate` or `detail` (default: OCR_PROFILE)
 
     Returns extracted text in markdown format optimized for AI processing
     """
@@ -303,15 +821,21 @@ async def extract_base64(request: Base64Request, _auth: bool = Depends(require_a
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
-    return process_pdf_content(content)
+    response = await run_blocking(process_pdf_content, content, profiles.get_profile(request.profile))
+    return project_response(response, request.view)
 
 
-@app.post("/extract-document", response_model=OCRResponse)
-async def extract_document(file: UploadFile = File(...), _auth: bool = Depends(require_api_key)):
+@app.post("/extract-document", response_model=OCRResponse, response_model_exclude_none=True)
+async def extract_document(
+    file: UploadFile = File(...),
+    view: ResponseView = "both",
+    _auth: bool = Depends(require_api_key),
+):
     """
     Extract text from Office documents (DOCX, PPTX, XLSX) via markitdown
 
     - **file**: Office document (max 50MB)
+    - **view**: `markdown`, `structured` or `both` (default)
 
     Returns extracted text in markdown format optimized for AI processing
     """
@@ -330,62 +854,133 @@ async def extract_document(file: UploadFile = File(...), _auth: bool = Depends(r
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
-    try:
-        result = md_converter.convert_stream(
-            io.BytesIO(content), stream_info=StreamInfo(extension=ext)
-        )
-        text = (result.text_content or "").strip()
-    except Exception as e:
-        print(f"markitdown document error: {str(e)}")
-        raise HTTPException(
-            status_code=400,
-            detail=f"Failed to process document: {str(e)}"
-        )
-
-    if not text:
-        raise HTTPException(
-            status_code=422,
-            detail="No text found in document"
-        )
+    response = await run_blocking(process_document_content, content, ext)
+    return project_response(response, view)
 
-    return OCRResponse(
-        success=True,
-        pages=1,
-        markdown=text,
-        structured=[{"page": 1, "text": text, "line_count": text.count("\n") + 1}],
-        method="markitdown",
-    )
 
-
-@app.post("/extract-image", response_model=OCRResponse)
-async def extract_image(file: UploadFile = File(...), _auth: bool = Depends(require_api_key)):
+@app.post("/extract-image", response_model=OCRResponse, response_model_exclude_none=True)
+async def extract_image(
+    file: UploadFile = File(...),
+    view: ResponseView = "both",
+    profile: Optional[ProfileName] = None,
+    _auth: bool = Depends(require_api_key),
+):
     """
     Extract text from uploaded image file
 
     - **file**: Image file (PNG, JPG, etc.)
+    - **view**: `markdown`, `structured` or `both` (default)
+    - **profile**: `fast`, `balanced`, `accurate` or `detail` (default: OCR_PROFILE)
 
     Returns extracted text
     """
     # Read and validate
     content = await file.read()
 
-    try:
-        image = Image.open(io.BytesIO(content))
-    except Exception as e:
+    response = await run_blocking(process_image_content, content, profiles.get_profile(profile))
+    return project_response(response, view)
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json", x_profile: Optional[str] = Header(default=None)):
+    """
+    Profile artifact of a request sent with X-Profile (admin only)
+
+    - **format**: `json` (stages + top functions) or `pstats` (raw cProfile dump)
+    """
+    if not profiling.is_authorized(x_profile):
+        raise HTTPException(status_code=401, detail="Invalid or missing profiling key")
+
+    if format == "pstats":
+        path = profiling.pstats_path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return FileResponse(path, filename=f"{profile_id}.prof")
+
+    summary = profiling.load_summary(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+def job_kind_for(filename: str) -> str:
+    """Map an upload to the extraction path used by process_job_content."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".pdf":
+        return "pdf"
+    if ext in DOC_EXTENSIONS:
+        return "document"
+    return "image"
+
+
+def process_job_content(kind: str, filename: str, content: bytes, params: dict) -> OCRResponse:
+    """Dispatch a queued job to the same code paths as the sync endpoints."""
+    profile = profiles.get_profile(params.get("profile"))
+    if kind == "pdf":
+        return process_pdf_content(content, profile)
+    if kind == "document":
+        return process_document_content(content, os.path.splitext(filename)[1].lower())
+    return process_image_content(content, profile)
+
+
+_job_queue: Optional[job_queue.JobQueue] = None
+
+
+def get_job_queue() -> job_queue.JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        try:
+            _job_queue = job_queue.load_queue()
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+    return _job_queue
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    profile: Optional[ProfileName] = None,
+    _auth: bool = Depends(require_api_key),
+):
+    """
+    Queue a PDF, Office document or image for a worker (`python worker.py`)
+
+    - **file**: PDF, DOCX/PPTX/XLSX or image (max 50MB)
+    - **profile**: `fast`, `balanced`, `accurate` or `detail` (default: OCR_PROFILE)
+
+    Returns the job id; poll GET /jobs/{job_id} for the result
+    """
+    filename = file.filename or "upload"
+    content = await file.read()
+
+    if len(content) > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid image file: {str(e)}"
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
-    lines = extract_text_from_image(image)
-    text = "\n".join(lines)
+    kind = job_kind_for(filename)
+    job_id = await run_blocking(get_job_queue().enqueue, kind, filename, content, {"profile": profile})
+    return {"job_id": job_id, "status": "queued", "kind": kind}
 
-    return OCRResponse(
-        success=True,
-        pages=1,
-        markdown=text,
-        structured=[{"page": 1, "text": text, "line_count": len(lines)}]
-    )
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    view: ResponseView = "both",
+    _auth: bool = Depends(require_api_key),
+):
+    """
+    Status of a queued job; contains `result` (OCRResponse) once `status` is `done`
+
+    - **view**: `markdown`, `structured` or `both` (default) for the result
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if "result" in job:
+        job["result"] = project_response(OCRResponse(**job["result"]), view).model_dump(exclude_none=True)
+    return job
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+"""
+PaddleOCR-Engine für den Extraktions-Service.
+
+Ausgelagert aus main.py, damit OCR-Worker-Prozesse das Modell laden können,
+ohne die FastAPI-App (und markitdown) mit zu importieren.
+"""
+
+import math
+import os
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+import page_preprocess
+from profiles import ExtractionProfile
+
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "german")
+
+# Intra-op-Threads pro Engine; 0 = verfügbare Kerne / Anzahl Worker.
+# PaddleOCR setzt die Thread-Zahl nur im MKLDNN-Pfad (ohne MKLDNN rechnet
+# jeder Predictor einthreadig), daher hängen beide Schalter zusammen.
+OCR_CPU_THREADS = int(os.getenv("OCR_CPU_THREADS", "0"))
+OCR_MKLDNN = os.getenv("OCR_MKLDNN", "1") == "1"
+
+# Zeilen unterhalb dieser Erkennungs-Konfidenz werden verworfen.
+MIN_CONFIDENCE = 0.5
+
+# Seitenorientierung: so viele der größten Zeilen werden klassifiziert, und
+# so sicher muss der Klassifikator sein, damit eine Zeile als "180" zählt.
+ORIENTATION_SAMPLE_LINES = 8
+ORIENTATION_MIN_SCORE = 0.9
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        # Railway/Docker begrenzen per Quota, nicht per Affinität
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def threads_per_worker(workers: int) -> int:
+    """Intra-op thread count for one of `workers` engines sharing this machine."""
+    if OCR_CPU_THREADS > 0:
+        return OCR_CPU_THREADS
+    return max(1, available_cpus() // max(1, workers))
+
+
+def create_engine(cpu_threads: Optional[int] = None):
+    """Initialize PaddleOCR with language support.
+
+    Models are downloaded on first use or during Docker build. The angle
+    classifier is always loaded: profiles use it per line or once per page.
+    cpu_threads caps Paddle's math library, OpenMP and OpenCV threads so
+    that several engines on one machine do not oversubscribe the cores."""
+    if cpu_threads is None:
+        cpu_threads = threads_per_worker(1)
+    # OpenMP liest die Variable beim Laden der Bibliothek, also vor dem Import
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+
+    import cv2
+    from paddleocr import PaddleOCR
+
+    cv2.setNumThreads(cpu_threads)
+    return PaddleOCR(
+        use_angle_cls=True,
+        lang=OCR_LANGUAGE,
+        show_log=False,
+        use_gpu=False,
+        enable_mkldnn=OCR_MKLDNN,
+        cpu_threads=cpu_threads,
+    )
+
+
+def configure(engine, profile: ExtractionProfile) -> None:
+    """Apply a profile's detection size and recognition batch to the engine.
+
+    PaddleOCR 2.7 liest beide Werte bei jedem Aufruf aus den Predictor-
+    Objekten, daher genügt ein Umsetzen statt einer Engine pro Profil (ein
+    Modellsatz pro Prozess). Nicht threadsicher — Worker bearbeiten ohnehin
+    nur einen Auftrag gleichzeitig."""
+    for op in engine.text_detector.preprocess_op:
+        if hasattr(op, "limit_side_len"):
+            op.limit_side_len = profile.det_limit_side_len
+    engine.text_recognizer.rec_batch_num = profile.rec_batch_num
+
+
+def image_to_array(image: Image.Image) -> np.ndarray:
+    """Convert PIL Image to numpy array (ensure RGB)"""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.array(image)
+
+
+def _box_size(box) -> tuple[float, float]:
+    """Width and height of a detected text quadrilateral (points clockwise from top-left)."""
+    pts = np.asarray(box, dtype=np.float32)
+    return float(np.linalg.norm(pts[1] - pts[0])), float(np.linalg.norm(pts[2] - pts[1]))
+
+
+def _is_sideways(result) -> bool:
+    """Most text boxes taller than wide: the page lies on its side (90°/270°)."""
+    sizes = [_box_size(line[0]) for line in result[0] if line]
+    sizes = [(w, h) for w, h in sizes if max(w, h) > 20]
+    if not sizes:
+        return False
+    return sum(1 for w, h in sizes if h > 1.5 * w) > len(sizes) / 2
+
+
+def _is_upside_down(engine, img_array: np.ndarray, result) -> bool:
+    """Classify a sample of the largest lines once instead of every line."""
+    boxes = [line[0] for line in result[0] if line]
+    boxes.sort(key=lambda b: -np.prod(_box_size(b)))
+    crops = []
+    for box in boxes[:ORIENTATION_SAMPLE_LINES]:
+        pts = np.asarray(box)
+        x0, y0 = np.maximum(pts.min(axis=0).astype(int), 0)
+        x1, y1 = pts.max(axis=0).astype(int)
+        crop = img_array[y0:y1, x0:x1]
+        if crop.size:
+            crops.append(np.ascontiguousarray(crop))
+    if not crops:
+        return False
+    # Direkt der Klassifikator: engine.ocr(det=False, rec=False) würde die
+    # Zeilen trotzdem erkennen lassen.
+    _, labels, _ = engine.text_classifier(crops)
+    flipped = sum(1 for label, score in labels if label == "180" and score >= ORIENTATION_MIN_SCORE)
+    return flipped > len(labels) / 2
+
+
+def _ocr_with_page_orientation(engine, img_array: np.ndarray):
+    """Assume the page is upright, check a few lines, rotate and rerun only if not.
+
+    Aufrechte Seiten (der Normalfall) kosten so nur einen Durchlauf plus eine
+    kleine Klassifikation statt der Winkelklassifikation jeder Zeile.
+    Liefert das Ergebnis und die Anzahl der 90°-Drehungen (np.rot90)."""
+    turns = 0
+    result = engine.ocr(img_array, cls=False)
+    if result is None or not result[0]:
+        return result, turns
+
+    if _is_sideways(result):
+        img_array = np.ascontiguousarray(np.rot90(img_array))
+        turns = 1
+        result = engine.ocr(img_array, cls=False)
+        if result is None or not result[0]:
+            return result, turns
+
+    if _is_upside_down(engine, img_array, result):
+        img_array = np.ascontiguousarray(np.rot90(img_array, 2))
+        turns += 2
+        result = engine.ocr(img_array, cls=False)
+    return result, turns
+
+
+def _unrotate_box(box, turns: int, shape: tuple[int, ...]) -> list:
+    """Map a box from np.rot90(img, turns) back into the coordinates of img (shape)."""
+    pts = np.asarray(box, dtype=np.float64)
+    height, width = shape[:2]
+    for done in range(turns, 0, -1):
+        # Breite des Bildes vor dieser Drehung
+        prev_width = width if (done - 1) % 2 == 0 else height
+        x, y = pts[:, 0].copy(), pts[:, 1].copy()
+        pts[:, 0] = prev_width - 1 - y
+        pts[:, 1] = x
+    return pts.tolist()
+
+
+def recognize(engine, img_array: np.ndarray, profile: ExtractionProfile) -> list[tuple[list, str]]:
+    """Run OCR with the profile's settings; confident lines as (box, text).
+
+    Die Seite wird vorher auf ihren Inhalt zugeschnitten und begradigt
+    (page_preprocess, abschaltbar mit PAGE_PREPROCESS=0). Boxen sind vier
+    Punkte in Koordinaten von img_array, auch wenn die Seite für die
+    Erkennung gedreht wurde (die Punktreihenfolge beginnt dann nicht mehr
+    oben links)."""
+    configure(engine, profile)
+    if profile.det_dpi:
+        return _recognize_two_pass(engine, img_array, profile)
+
+    prepared = page_preprocess.prepare(img_array) if page_preprocess.PAGE_PREPROCESS else None
+    page = prepared.array if prepared is not None else img_array
+
+    turns = 0
+    if profile.page_orientation:
+        result, turns = _ocr_with_page_orientation(engine, page)
+    else:
+        result = engine.ocr(page, cls=profile.use_angle_cls)
+
+    lines = []
+    if result is None or not result[0]:
+        return lines
+
+    for line in result[0]:
+        if line and len(line) > 1:
+            text = line[1][0]  # Get the text content
+            confidence = line[1][1]  # Get confidence score
+            if confidence > MIN_CONFIDENCE:  # Filter low-confidence results
+                box = _unrotate_box(line[0], turns, page.shape) if turns else line[0]
+                if prepared is not None:
+                    box = prepared.to_source(box)
+                lines.append((box, text))
+
+    return lines
+
+
+def _recognize_two_pass(engine, img_array: np.ndarray, profile: ExtractionProfile) -> list[tuple[list, str]]:
+    """Detect text on a copy scaled to det_dpi, recognize crops of the full page.
+
+    Die meiste Seitenfläche ist weiß; die teure Detektion sieht so nur einen
+    Bruchteil der Pixel, die Erkennung trotzdem die volle Auflösung. Kein
+    Zuschnitt/Begradigen: Die Ausschnitte werden pro Box entzerrt
+    (get_rotate_crop_image), 180°-Zeilen erledigt die Winkelklassifikation."""
+    import cv2
+    from tools.infer.predict_system import sorted_boxes
+    from tools.infer.utility import get_rotate_crop_image
+
+    height, width = img_array.shape[:2]
+    scale = profile.det_dpi / profile.dpi
+    small = cv2.resize(
+        img_array,
+        (max(1, round(width * scale)), max(1, round(height * scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+    dt_boxes, _ = engine.text_detector(small)
+    if dt_boxes is None or len(dt_boxes) == 0:
+        return []
+
+    boxes = [
+        np.clip(np.asarray(box) / scale, 0, [width - 1, height - 1]).astype(np.float32)
+        for box in sorted_boxes(dt_boxes)
+    ]
+    crops = [get_rotate_crop_image(img_array, box.copy()) for box in boxes]
+    if profile.use_angle_cls:
+        crops, _, _ = engine.text_classifier(crops)
+    rec_res, _ = engine.text_recognizer(crops)
+
+    return [
+        (box.tolist(), text)
+        for box, (text, confidence) in zip(boxes, rec_res)
+        if confidence > MIN_CONFIDENCE
+    ]
+
+
+def recognize_lines(engine, img_array: np.ndarray, profile: ExtractionProfile) -> list[str]:
+    """Run OCR with the profile's settings and return the confident text lines"""
+    return [text for _, text in recognize(engine, img_array, profile)]
+
+
+def current_rss_bytes() -> int:
+    """Aktueller Resident Set Size dieses Prozesses in Bytes.
+
+    Liest /proc (Linux/Railway); auf anderen Systemen Fallback auf den
+    Spitzenwert aus getrusage (macOS liefert Bytes, Linux KiB)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,287 @@
+"""
+Supervised OCR-Worker-Prozesse.
+
+PaddlePaddle/OpenCV wachsen im Dauerbetrieb im RSS. Statt auf einen
+Container-Neustart durch Railway zu warten, läuft die Erkennung in
+Kindprozessen, die nach OCR_WORKER_MAX_JOBS Aufträgen oder beim
+Überschreiten von OCR_WORKER_MAX_RSS_MB ersetzt werden. Ein Worker bekommt
+immer nur einen Auftrag gleichzeitig; ersetzt wird er erst, nachdem dieser
+zurückgemeldet ist und bevor ihm ein neuer zugeteilt wird — laufende Jobs
+gehen also nie verloren.
+
+Seitenbilder werden als SharedPage (siehe shared_pages.py) übergeben: über
+die Pipe geht nur der Deskriptor, der Worker liest eine NumPy-View. Ein
+optionaler Ausschnitt (Streifen großer Fotos, siehe image_intake.py) wird
+erst im Worker aus dieser View geschnitten.
+
+Mit Zeitbudget (recognize(timeout=...)) wird ein Worker, der nicht
+rechtzeitig antwortet, hart beendet und ersetzt; der Auftrag endet mit
+OCRTimeout, die übrigen Seiten laufen auf den anderen Workern weiter.
+Ein neuer oder recycelter Worker meldet sich erst nach dem Laden der
+Modelle ("ready") und wird erst dann in den Pool gestellt; das Laden zählt
+also nie zum Zeitbudget einer Seite.
+
+Start der Worker (OCR_PRELOAD):
+
+- `0` (Standard): spawn; jeder Worker lädt die Modelle selbst.
+- `1`: preload-then-fork. Ein forkserver lädt die Modelle einmal
+  (ocr_preload.py), die Worker werden von ihm geforkt und teilen sich die
+  Gewichte copy-on-write. Mehr Worker kosten so kaum zusätzlichen Speicher,
+  und ein recycelter Worker ist sofort ersetzt.
+
+In beiden Modi bekommt jeder Worker einen festen Anteil der Kerne als
+Intra-op-Threads (ocr_engine.threads_per_worker), damit sich N Worker nicht
+gegenseitig die CPUs streitig machen.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+from typing import Optional
+
+import numpy as np
+
+import ocr_engine
+import shared_pages
+from image_intake import Region, crop
+from profiles import ExtractionProfile, PROFILES
+from shared_pages import SharedPage
+
+
+def _worker_main(conn, cpu_threads: int, preload: bool) -> None:
+    """Entry point of an OCR worker process: load model, serve jobs until None."""
+    engine = None
+    if preload:
+        import ocr_preload  # im geforkten Kind bereits geladen
+
+        engine = ocr_preload.ENGINE
+    if engine is None:
+        engine = ocr_engine.create_engine(cpu_threads)
+    conn.send(("ready", None, ocr_engine.current_rss_bytes()))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        try:
+            lines = _run_job(engine, job)
+            conn.send(("ok", lines, ocr_engine.current_rss_bytes()))
+        except Exception as e:
+            conn.send(("error", str(e), ocr_engine.current_rss_bytes()))
+    conn.close()
+
+
+def _run_job(engine, job) -> list[tuple[list, str]]:
+    kind, payload, profile_name, region = job
+    profile = PROFILES[profile_name]
+    if kind == "array":
+        return ocr_engine.recognize(engine, crop(payload, region), profile)
+
+    view, shm = shared_pages.attach(payload)
+    try:
+        return ocr_engine.recognize(engine, crop(view, region), profile)
+    finally:
+        del view
+        shm.close()
+
+
+class WorkerCrashed(RuntimeError):
+    """Der Worker-Prozess ist während eines Auftrags gestorben (z.B. OOM-Kill)."""
+
+
+class OCRTimeout(TimeoutError):
+    """Der Worker hat sein Zeitbudget überschritten und wurde beendet."""
+
+
+def _shared_bytes(pid: int) -> int:
+    """Resident pages of a process that are shared with others (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[2]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_threads: int, preload: bool) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, cpu_threads, preload), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss_bytes = 0
+        self.crashed = False
+
+    def wait_ready(self) -> None:
+        """Block until the worker has loaded its models (no time limit)."""
+        try:
+            status, _, self.rss_bytes = self.conn.recv()
+        except (EOFError, OSError):
+            status = None
+        if status != "ready":
+            self.crashed = True
+
+    def run(self, job: tuple, timeout: Optional[float] = None) -> list[tuple[list, str]]:
+        if self.crashed:
+            raise WorkerCrashed(f"OCR worker {self.process.pid} died while loading the models")
+        timed_out = False
+        try:
+            self.conn.send(job)
+            timed_out = timeout is not None and not self.conn.poll(timeout)
+            if not timed_out:
+                status, payload, self.rss_bytes = self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.crashed = True
+            raise WorkerCrashed(f"OCR worker {self.process.pid} died: {e}") from e
+        finally:
+            self.jobs += 1
+        if timed_out:
+            self.crashed = True
+            self.process.kill()
+            raise OCRTimeout(f"OCR worker {self.process.pid} timed out after {timeout:.0f}s")
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def stop(self, timeout: float = 10.0) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class OCRWorkerPool:
+    """Fixed-size pool of OCR processes with job-count and RSS based recycling."""
+
+    def __init__(self, size: int, max_jobs: int = 0, max_rss_mb: int = 0, preload: bool = False) -> None:
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.preload = preload
+        self.cpu_threads = ocr_engine.threads_per_worker(size)
+        # Nie direkt aus dem API-Prozess forken: er hält Uvicorn-/Executor-
+        # Threads, die in einem geforkten Kind in undefiniertem Zustand landen
+        # würden. Der forkserver ist ein frischer, einthreadiger Prozess.
+        self._ctx = mp.get_context("forkserver" if preload else "spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: list[_Worker] = []
+        self.recycled = 0
+
+    def start(self) -> None:
+        if self.preload:
+            # Gilt für den forkserver, der beim ersten Worker-Start entsteht
+            os.environ["OCR_PRELOAD_CPU_THREADS"] = str(self.cpu_threads)
+            self._ctx.set_forkserver_preload(["ocr_preload"])
+        for _ in range(self.size):
+            self._add_worker()
+
+    def _add_worker(self) -> None:
+        worker = _Worker(self._ctx, self.cpu_threads, self.preload)
+        with self._lock:
+            self._workers.append(worker)
+        # Erst nach "ready" zuteilbar; bis dahin übernehmen die anderen Worker.
+        # Stirbt er beim Laden, geht er als crashed in den Pool und wird beim
+        # ersten Auftrag ersetzt.
+        threading.Thread(target=self._await_ready, args=(worker,), daemon=True).start()
+
+    def _await_ready(self, worker: _Worker) -> None:
+        worker.wait_ready()
+        self._idle.put(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            self._workers.remove(worker)
+            self.recycled += 1
+        worker.stop()
+
+    def _needs_recycling(self, worker: _Worker) -> bool:
+        if worker.crashed or not worker.process.is_alive():
+            return True
+        if self.max_jobs and worker.jobs >= self.max_jobs:
+            return True
+        return bool(self.max_rss_bytes and worker.rss_bytes > self.max_rss_bytes)
+
+    def recognize(
+        self,
+        image: "np.ndarray | SharedPage",
+        profile: ExtractionProfile,
+        region: Optional[Region] = None,
+        timeout: Optional[float] = None,
+    ) -> list[tuple[list, str]]:
+        """Run OCR on an idle worker; blocks until one is free.
+
+        Returns (box, text) per line, boxes relative to region. The timeout
+        counts from dispatch to a worker that has loaded its models, not
+        the wait for a free one.
+        A SharedPage
+        is held (acquire/release) for the duration of the job and only its
+        descriptor crosses the pipe; plain arrays are pickled."""
+        if isinstance(image, SharedPage):
+            image.acquire()
+            job = ("shm", image.descriptor, profile.name, region)
+        else:
+            job = ("array", image, profile.name, region)
+
+        worker = self._idle.get()
+        try:
+            return worker.run(job, timeout)
+        finally:
+            if isinstance(image, SharedPage):
+                image.release()
+            if self._needs_recycling(worker):
+                print(
+                    f"Recycling OCR worker {worker.process.pid} "
+                    f"(jobs={worker.jobs}, rss={worker.rss_bytes // (1024 * 1024)}MB)"
+                )
+                # Ersatz zuerst starten, damit die Pool-Größe konstant bleibt,
+                # während der alte Prozess beendet wird.
+                self._add_worker()
+                self._retire(worker)
+            else:
+                self._idle.put(worker)
+
+    def stats(self) -> dict:
+        with self._lock:
+            workers = list(self._workers)
+        return {
+            "size": self.size,
+            "mode": "preload" if self.preload else "spawn",
+            "cpu_threads": self.cpu_threads,
+            "recycled": self.recycled,
+            "workers": [
+                {
+                    "pid": w.process.pid,
+                    "jobs": w.jobs,
+                    "rss_mb": w.rss_bytes // (1024 * 1024),
+                    "shared_mb": _shared_bytes(w.process.pid) // (1024 * 1024),
+                }
+                for w in workers
+            ],
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+def create_pool(size: int, max_jobs: int, max_rss_mb: int, preload: bool = False) -> Optional[OCRWorkerPool]:
+    """Pool bauen und starten; size <= 0 bedeutet In-Process-OCR (kein Pool)."""
+    if size <= 0:
+        return None
+    pool = OCRWorkerPool(size, max_jobs=max_jobs, max_rss_mb=max_rss_mb, preload=preload)
+    pool.start()
+    return pool
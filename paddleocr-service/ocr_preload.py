@@ -0,0 +1,27 @@
+"""
+Vorab geladene OCR-Engine für den Preload-Modus (OCR_PRELOAD=1).
+
+Wird nur im forkserver-Prozess des OCR-Pools importiert (siehe ocr_pool.py):
+Die Modelle werden dort einmal geladen, und jeder Worker wird von diesem
+Prozess geforkt. Die Gewichte liegen dann copy-on-write in allen Workern,
+statt pro Worker erneut geladen zu werden; auch der Ersatz eines recycelten
+Workers kostet nur noch einen fork().
+
+Hier läuft bewusst keine Inferenz: Die OpenMP/MKLDNN-Threadpools entstehen
+erst beim ersten Lauf und damit erst im Kind, nicht in einem Prozess, der
+danach noch forkt.
+
+Die Thread-Zahl je Worker setzt der Pool vor dem Start des forkservers in
+OCR_PRELOAD_CPU_THREADS.
+"""
+
+import os
+
+import ocr_engine
+
+ENGINE = None
+try:
+    ENGINE = ocr_engine.create_engine(int(os.environ.get("OCR_PRELOAD_CPU_THREADS", "1")))
+except Exception as e:
+    # Der forkserver fängt nur ImportError ab; ohne Engine laden die Worker selbst
+    print(f"OCR preload failed, workers will load their own models: {str(e)}")
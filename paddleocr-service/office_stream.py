@@ -0,0 +1,290 @@
+"""
+Streamende Extraktion von Office-Dokumenten (DOCX/PPTX/XLSX).
+
+markitdown baut aus dem ganzen Dokument einen String; ein großer
+Notenexport oder eine 200-Folien-Präsentation landete so als ein Block in
+"page 1". Hier wird das Dokument Einheit für Einheit gelesen und jede
+Einheit einzeln geliefert:
+
+- PPTX: eine Einheit pro Folie (Reihenfolge laut presentation.xml),
+  höchstens OFFICE_MAX_SLIDES; der Hinweis auf die übrigen hängt an der
+  letzten Folie
+- XLSX: eine Einheit pro Tabellenblatt als Markdown-Tabelle, höchstens
+  OFFICE_MAX_ROWS Zeilen je Blatt (openpyxl read_only)
+- DOCX: eine Einheit pro Abschnitt, getrennt an Überschriften und nach
+  OFFICE_MAX_SECTION_CHARS Zeichen (ein Dokument ohne Überschriften wird
+  sonst ein einziger Block); ein einzelner Absatz oder eine Tabelle über
+  dem Limit wird abgeschnitten
+
+DOCX und PPTX werden mit iterparse direkt aus dem ZIP gelesen und
+verarbeitete Elemente sofort verworfen; im Speicher liegt also nie der
+ganze XML-Baum, sondern nur die aktuelle Einheit.
+"""
+
+import io
+import os
+import posixpath
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+
+OFFICE_STREAMING = os.getenv("OFFICE_STREAMING", "1") == "1"
+OFFICE_MAX_ROWS = int(os.getenv("OFFICE_MAX_ROWS", "1000"))
+OFFICE_MAX_SLIDES = int(os.getenv("OFFICE_MAX_SLIDES", "200"))
+OFFICE_MAX_SECTION_CHARS = int(os.getenv("OFFICE_MAX_SECTION_CHARS", "20000"))
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+# Überschriften-Formatvorlagen (Word speichert "Überschrift 1" als "berschrift1")
+HEADING_STYLE = re.compile(r"^(heading|berschrift|title|titel)", re.IGNORECASE)
+
+
+@dataclass
+class Unit:
+    """One slide, sheet or document section."""
+
+    kind: str  # "slide" | "sheet" | "section"
+    title: Optional[str]
+    text: str
+    truncated: bool = False
+
+
+def iter_units(content: bytes, ext: str) -> Iterator[Unit]:
+    """Yield the units of an Office document one at a time."""
+    if ext == ".pptx":
+        return _iter_slides(content)
+    if ext == ".xlsx":
+        return _iter_sheets(content)
+    if ext == ".docx":
+        return _iter_sections(content)
+    raise ValueError(f"Unsupported document type {ext}")
+
+
+def _table_markdown(rows: list[list[str]]) -> str:
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    lines = []
+    for i, row in enumerate(rows):
+        cells = [c.replace("|", "\\|").replace("\n", " ") for c in row] + [""] * (width - len(row))
+        lines.append("| " + " | ".join(cells) + " |")
+        if i == 0:
+            lines.append("|" + " --- |" * width)
+    return "\n".join(lines)
+
+
+# PPTX ------------------------------------------------------------------------
+
+
+def _slide_paths(archive: zipfile.ZipFile) -> list[str]:
+    """Slide part names in presentation order."""
+    rels = ElementTree.fromstring(archive.read("ppt/_rels/presentation.xml.rels"))
+    targets = {
+        rel.get("Id"): posixpath.normpath(posixpath.join("ppt", rel.get("Target")))
+        for rel in rels.iter(f"{PKG_REL}Relationship")
+    }
+    presentation = ElementTree.fromstring(archive.read("ppt/presentation.xml"))
+    return [
+        targets[slide.get(f"{R}id")]
+        for slide in presentation.iter(f"{P}sldId")
+        if slide.get(f"{R}id") in targets
+    ]
+
+
+def _iter_slides(content: bytes) -> Iterator[Unit]:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        paths = _slide_paths(archive)
+        skipped = len(paths) - OFFICE_MAX_SLIDES
+        for number, path in enumerate(paths[:OFFICE_MAX_SLIDES], 1):
+            with archive.open(path) as f:
+                unit = _slide_unit(f)
+            if skipped > 0 and number == OFFICE_MAX_SLIDES:
+                # An die letzte echte Folie, nicht als eigene "Folie N+1"
+                note = f"[{skipped} weitere Folien nicht extrahiert]"
+                unit.text = f"{unit.text}\n\n{note}" if unit.text else note
+                unit.truncated = True
+            yield unit
+
+
+def _slide_unit(stream) -> Unit:
+    title = None
+    blocks: list[str] = []
+    rows: list[list[str]] = []
+    row: list[str] = []
+    in_table = 0
+    is_title = False
+    shape_start = 0
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == f"{A}tbl":
+                in_table += 1
+                rows = []
+            elif tag == f"{P}sp":
+                shape_start = len(blocks)
+            elif tag == f"{P}ph" and elem.get("type") in ("title", "ctrTitle"):
+                is_title = True
+            continue
+        if tag == f"{A}p" and not in_table:
+            text = "".join(t.text or "" for t in elem.iter(f"{A}t")).strip()
+            if text:
+                blocks.append(text)
+        elif tag == f"{A}tc":
+            row.append(" ".join(t.text or "" for t in elem.iter(f"{A}t")).strip())
+        elif tag == f"{A}tr":
+            rows.append(row)
+            row = []
+        elif tag == f"{A}tbl":
+            in_table -= 1
+            blocks.append(_table_markdown(rows))
+        elif tag == f"{P}sp":
+            # Titel-Platzhalter: wird Folientitel statt Textblock
+            if is_title and title is None:
+                title = " ".join(blocks[shape_start:]) or None
+                del blocks[shape_start:]
+            is_title = False
+        else:
+            continue
+        if tag in (f"{P}sp", f"{A}tbl", f"{P}graphicFrame"):
+            elem.clear()
+    return Unit("slide", title, "\n\n".join(b for b in blocks if b))
+
+
+# XLSX ------------------------------------------------------------------------
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _iter_sheets(content: bytes) -> Iterator[Unit]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows: list[list[str]] = []
+            truncated = False
+            for values in sheet.iter_rows(values_only=True):
+                cells = [_cell_text(v) for v in values]
+                if not any(cells):
+                    continue
+                if len(rows) >= OFFICE_MAX_ROWS:
+                    truncated = True
+                    break
+                rows.append(cells)
+            # Leere Spalten am Ende abschneiden
+            width = max((max((i + 1 for i, c in enumerate(r) if c), default=0) for r in rows), default=0)
+            text = _table_markdown([r[:width] for r in rows])
+            if truncated:
+                text += f"\n\n[Nach {OFFICE_MAX_ROWS} Zeilen abgeschnitten]"
+            yield Unit("sheet", sheet.title, text, truncated=truncated)
+    finally:
+        workbook.close()
+
+
+# DOCX ------------------------------------------------------------------------
+
+
+def _paragraph_text(paragraph) -> str:
+    """Text of a w:p without the text boxes anchored in it.
+
+    Textfelder (w:txbxContent) stecken in einem Run des umgebenden Absatzes,
+    ihre Absätze werden aber selbst als Absätze gelesen."""
+    parts: list[str] = []
+
+    def walk(elem) -> None:
+        for child in elem:
+            if child.tag == f"{W}txbxContent":
+                continue
+            if child.tag == f"{W}t":
+                parts.append(child.text or "")
+            walk(child)
+
+    walk(paragraph)
+    return "".join(parts)
+
+
+def _cap_block(text: str) -> tuple[str, bool]:
+    """A paragraph or table cut to OFFICE_MAX_SECTION_CHARS, and whether it was cut."""
+    if len(text) <= OFFICE_MAX_SECTION_CHARS:
+        return text, False
+    return text[:OFFICE_MAX_SECTION_CHARS] + f"\n\n[Nach {OFFICE_MAX_SECTION_CHARS} Zeichen abgeschnitten]", True
+
+
+def _iter_sections(content: bytes) -> Iterator[Unit]:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive, archive.open("word/document.xml") as f:
+        heading: Optional[str] = None
+        title: Optional[str] = None
+        blocks: list[str] = []
+        chars = 0
+        truncated = False
+        rows: list[list[str]] = []
+        row: list[str] = []
+        in_table = 0
+        # mc:Fallback wiederholt den Inhalt von mc:Choice (z.B. ein Textfeld
+        # als DrawingML und noch einmal als VML) und wird übersprungen.
+        in_fallback = 0
+        for event, elem in ElementTree.iterparse(f, events=("start", "end")):
+            tag = elem.tag
+            if tag == f"{MC}Fallback":
+                in_fallback += 1 if event == "start" else -1
+                if event == "end":
+                    elem.clear()
+                continue
+            if in_fallback:
+                continue
+            block = None
+            if event == "start":
+                if tag == f"{W}tbl":
+                    in_table += 1
+                    if in_table == 1:
+                        rows = []
+                continue
+            if tag == f"{W}p" and not in_table:
+                text = _paragraph_text(elem).strip()
+                style = elem.find(f"{W}pPr/{W}pStyle")
+                if text and style is not None and HEADING_STYLE.match(style.get(f"{W}val", "")):
+                    if blocks or title:
+                        yield Unit("section", title, "\n\n".join(blocks), truncated=truncated)
+                    heading = title = text
+                    blocks, chars, truncated = [], 0, False
+                elif text:
+                    block = text
+                elem.clear()
+            elif tag == f"{W}tc" and in_table == 1:
+                row.append(" ".join(_paragraph_text(p) for p in elem.iter(f"{W}p")).strip())
+                elem.clear()
+            elif tag == f"{W}tr" and in_table == 1:
+                rows.append(row)
+                row = []
+                elem.clear()
+            elif tag == f"{W}tbl":
+                in_table -= 1
+                if not in_table:
+                    block = _table_markdown(rows)
+                    elem.clear()
+            if not block:
+                continue
+            block, cut = _cap_block(block)
+            if blocks and chars + len(block) > OFFICE_MAX_SECTION_CHARS:
+                # Langer Abschnitt: als Fortsetzung unter derselben Überschrift
+                yield Unit("section", title, "\n\n".join(blocks), truncated=truncated)
+                title = f"{heading} (Fortsetzung)" if heading else None
+                blocks, chars, truncated = [], 0, False
+            blocks.append(block)
+            chars += len(block)
+            truncated = truncated or cut
+        if blocks or title:
+            yield Unit("section", title, "\n\n".join(blocks), truncated=truncated)
@@ -0,0 +1,121 @@
+"""
+Seitenweiser OCR-Cache über Dokumentgrenzen hinweg.
+
+Dieselbe Standard-Arbeitsblattseite steckt in vielen Sammel-PDFs, jeweils
+mit anderem Deckblatt — ein Hash über die ganze Datei trifft das nie. Der
+Schlüssel hier ist ein SHA-256 über das normalisierte gerenderte Seitenbild
+(auf 4 Bit quantisiert, damit Antialiasing-Rauschen verschiedener Renderer-
+Läufe nicht zählt) plus die OCR-Konfiguration. Gespeichert werden nur die
+erkannten Zeilen als JSON, begrenzt auf PAGE_CACHE_MAX_MB; verdrängt wird
+die am längsten nicht gelesene Seite (mtime wird bei Treffern erneuert).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "/tmp/meoluna-page-cache")
+PAGE_CACHE_MAX_MB = int(os.getenv("PAGE_CACHE_MAX_MB", "256"))
+
+
+def page_key(page: np.ndarray, config: str) -> str:
+    """Hash of the quantized page bitmap and the OCR settings that produced it."""
+    digest = hashlib.sha256()
+    digest.update(config.encode())
+    digest.update(repr(page.shape).encode())
+    digest.update(np.ascontiguousarray(page >> 4).data)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """Size-bounded on-disk cache: page key -> recognized lines."""
+
+    def __init__(self, directory: str = PAGE_CACHE_DIR, max_mb: int = PAGE_CACHE_MAX_MB) -> None:
+        self.root = Path(directory)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[list[str]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = json.load(f)
+            os.utime(path)  # LRU: Treffer nach hinten schieben
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return lines
+
+    def put(self, key: str, lines: list[str]) -> None:
+        path = self._path(key)
+        data = json.dumps(lines, ensure_ascii=False).encode("utf-8")
+        path.parent.mkdir(exist_ok=True)
+        # Atomar schreiben: parallele Worker lesen nie eine halbe Datei.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            # Überschreibt dieselbe Seite (z.B. zwei Requests parallel), zählt
+            # nur der Unterschied; Ersetzen unter dem Lock hält _size stimmig.
+            try:
+                old_size = path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp, path)
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is at 90% of its limit."""
+        entries = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries_mb": round(self._size / (1024 * 1024), 1),
+                "max_mb": self.max_bytes // (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def create_cache() -> Optional[PageCache]:
+    """PAGE_CACHE_MAX_MB=0 schaltet den Cache ab."""
+    if PAGE_CACHE_MAX_MB <= 0:
+        return None
+    return PageCache()
@@ -0,0 +1,395 @@
+"""
+Seitenweise PDF-Rasterisierung für die Render/OCR-Pipeline.
+
+Zwei Backends, wählbar über PDF_RENDERER:
+
+- `pdfium` (Standard): rendert im Prozess über pypdfium2 direkt in ein
+  PIL-Bild, ohne Subprozess, PPM-Dateien und erneutes Dekodieren. PDFium ist
+  nicht threadsicher, daher rendert pro Prozess immer nur ein Thread
+  gleichzeitig (_pdfium_lock).
+- `pdftoppm`: pdf2image/poppler wie bisher. Das PDF wird einmal abgelegt
+  und dann Seite für Seite über pdftoppm (first_page/last_page) gerendert.
+  Dient auch als Rückfall, wenn pypdfium2 fehlt oder ein PDF nicht öffnen
+  kann.
+
+Zeitbudget pro Seite (render_page(timeout=...)): pdftoppm wird nach Ablauf
+beendet. PDFium lässt sich innerhalb eines Prozesses nicht abbrechen; mit
+Zeitbudget rendert es deshalb in einem eigenen Kindprozess (_RenderProcess,
+wie die OCR-Worker in ocr_pool.py). Überschreitet eine Seite das Budget,
+wird der Kindprozess hart beendet und beim nächsten Render neu gestartet;
+offene Dokumente werden dort bei Bedarf erneut geöffnet. Über die Pipe gehen
+nur Deskriptoren: Das PDF liegt einmal in Shared Memory und wird pro
+Render-Prozess einmal daraus geladen, jede Seite rendert direkt in eine
+SharedPage (render_shared), die die OCR-Worker ohne weitere Kopie lesen.
+Gegenüber dem Rendern im Prozess plus SharedPage.from_image kommt also keine
+Kopie pro Seite hinzu. Ohne Zeitbudget rendert PDFium wie bisher im Prozess.
+Übergroße Seiten (Poster, kaputte MediaBox) rendert PDFium mit so weit
+reduzierter DPI, dass sie unter PAGE_MAX_MEGAPIXELS bleiben.
+
+Vergleich pro Seite: `python -m bench.render_speed` (siehe README).
+
+inspect_pages() liest für die Aufwandsschätzung (estimate.py) nur die
+Seitengrößen und eine Stichprobe des Textlayers, ohne zu rendern.
+"""
+
+import io
+import itertools
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+from pdf2image.exceptions import PDFPopplerTimeoutError
+
+import shared_pages
+from shared_pages import PageDescriptor, SharedPage
+
+PDF_RENDERER = os.getenv("PDF_RENDERER", "pdfium")
+if PDF_RENDERER not in ("pdfium", "pdftoppm"):
+    raise ValueError(f"PDF_RENDERER must be pdfium or pdftoppm, got {PDF_RENDERER!r}")
+
+PAGE_MAX_MEGAPIXELS = float(os.getenv("PAGE_MAX_MEGAPIXELS", "60"))
+
+_pdfium_lock = threading.Lock()
+
+
+class RenderTimeout(TimeoutError):
+    """Eine Seite hat ihr Render-Zeitbudget überschritten."""
+
+
+def _render_pdfium(pdf, page_number: int, dpi: float) -> Image.Image:
+    """Render one 1-based page of an open pypdfium2 document as RGB."""
+    page = pdf[page_number - 1]
+    try:
+        width, height = page.get_size()
+        megapixels = width * height * (dpi / 72) ** 2 / 1e6
+        if megapixels > PAGE_MAX_MEGAPIXELS:
+            dpi = dpi * (PAGE_MAX_MEGAPIXELS / megapixels) ** 0.5
+        bitmap = page.render(scale=dpi / 72)
+        try:
+            image = bitmap.to_pil()
+            # to_pil() teilt sich den Puffer mit der Bitmap
+            return image.convert("RGB") if image.mode != "RGB" else image.copy()
+        finally:
+            bitmap.close()
+    finally:
+        page.close()
+
+
+class _ChildError(RuntimeError):
+    """PDFium konnte eine Seite nicht rendern; der Render-Prozess läuft weiter."""
+
+
+def _open_shared(pdfium, descriptor: PageDescriptor):
+    """Open a PDF that the parent put into shared memory (one copy, no pickling)."""
+    view, shm = shared_pages.attach(descriptor)
+    try:
+        return pdfium.PdfDocument(view.tobytes())
+    finally:
+        del view
+        shm.close()
+
+
+def _render_main(conn) -> None:
+    """Entry point of the render process: serve render/close jobs until None."""
+    import pypdfium2 as pdfium
+
+    conn.send(("ready", None))
+    documents = {}
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        kind, doc_id, *args = job
+        if kind == "close":
+            if doc_id in documents:
+                documents.pop(doc_id).close()
+            continue
+        source, page_number, dpi = args
+        try:
+            if doc_id not in documents:
+                documents[doc_id] = _open_shared(pdfium, source)
+            image = _render_pdfium(documents[doc_id], page_number, dpi)
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+            continue
+        # Der Elternprozess legt die Seite an; hier wird nur hineinkopiert.
+        conn.send(("size", (image.height, image.width, 3)))
+        target = conn.recv()
+        view, shm = shared_pages.attach(target, writable=True)
+        view[...] = np.asarray(image)
+        del view
+        shm.close()
+        conn.send(("ok", None))
+    conn.close()
+
+
+class _RenderProcess:
+    """PDFium in a child process that can be killed when a page overruns."""
+
+    def __init__(self) -> None:
+        # spawn, nicht fork: der API-Prozess hält Threads (siehe ocr_pool.py)
+        ctx = mp.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_render_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Start und Import zählen nicht zum Zeitbudget der ersten Seite
+        self._expect("ready", None)
+        # Dokumente, die in diesem Prozess geöffnet sind
+        self.documents: set[int] = set()
+
+    def _expect(self, status: str, deadline: Optional[float]):
+        """Next reply from the child; None when the deadline passed first."""
+        if deadline is not None and not self.conn.poll(max(0.0, deadline - time.monotonic())):
+            return None
+        reply, payload = self.conn.recv()
+        if reply == "error":
+            raise _ChildError(payload)
+        if reply != status:
+            raise RuntimeError(f"pdfium render process sent {reply!r}, expected {status!r}")
+        return (payload,)
+
+    def stop(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def render(self, doc_id: int, source: SharedPage, page_number: int, dpi: int, timeout: float) -> SharedPage:
+        deadline = time.monotonic() + timeout
+        page: Optional[SharedPage] = None
+        try:
+            self.conn.send(("render", doc_id, source.descriptor, page_number, dpi))
+            reply = self._expect("size", deadline)
+            if reply is not None:
+                page = SharedPage(reply[0])
+                self.conn.send(page.descriptor)
+                reply = self._expect("ok", deadline)
+        except _ChildError:
+            raise
+        except (EOFError, OSError, RuntimeError) as e:
+            if page is not None:
+                page.release()
+            self.stop()
+            raise RuntimeError(f"pdfium render process {self.process.pid} died: {e}") from e
+        if reply is None:
+            if page is not None:
+                page.release()
+            self.stop()
+            raise RenderTimeout(f"page {page_number}: pdfium timed out after {timeout:.0f}s")
+        self.documents.add(doc_id)
+        return page
+
+    def close_document(self, doc_id: int) -> None:
+        if doc_id in self.documents:
+            self.documents.discard(doc_id)
+            try:
+                self.conn.send(("close", doc_id, None, None, None))
+            except OSError:
+                pass
+
+
+# Ein Render-Prozess je API-Prozess, geteilt über _pdfium_lock; nach einem
+# Timeout oder Absturz wird er beendet und beim nächsten Render ersetzt.
+_render_process: Optional[_RenderProcess] = None
+_doc_ids = itertools.count()
+
+
+def _render_isolated(doc_id: int, source: SharedPage, page_number: int, dpi: int, timeout: float) -> SharedPage:
+    global _render_process
+    with _pdfium_lock:
+        if _render_process is None:
+            _render_process = _RenderProcess()
+        try:
+            return _render_process.render(doc_id, source, page_number, dpi, timeout)
+        finally:
+            if not _render_process.process.is_alive():
+                print(f"pdfium render process stopped on page {page_number}, restarting on next use")
+                _render_process = None
+
+
+class PdfDocument(ABC):
+    """A PDF that can be rasterized one page at a time."""
+
+    renderer = ""
+    page_count = 0
+
+    @abstractmethod
+    def render_page(self, page_number: int, dpi: int, timeout: Optional[float] = None) -> Image.Image:
+        """Render a single 1-based page as RGB; RenderTimeout after timeout seconds."""
+
+    def render_shared(self, page_number: int, dpi: int, timeout: Optional[float] = None) -> SharedPage:
+        """Like render_page, but straight into shared memory for the OCR workers."""
+        return SharedPage.from_image(self.render_page(page_number, dpi, timeout))
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release the document (temp file, PDFium handle)."""
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PopplerDocument(PdfDocument):
+    """pdftoppm via pdf2image; the PDF is written to a temp file once."""
+
+    renderer = "pdftoppm"
+
+    def __init__(self, content: bytes) -> None:
+        fd, self.path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        try:
+            self.page_count = int(pdfinfo_from_path(self.path)["Pages"])
+        except Exception:
+            self.close()
+            raise
+
+    def render_page(self, page_number: int, dpi: int, timeout: Optional[float] = None) -> Image.Image:
+        try:
+            images = convert_from_path(
+                self.path, dpi=dpi, first_page=page_number, last_page=page_number,
+                timeout=None if timeout is None else max(1, round(timeout)),
+            )
+        except PDFPopplerTimeoutError as e:
+            raise RenderTimeout(f"page {page_number}: pdftoppm timed out after {timeout:.0f}s") from e
+        if not images:
+            raise ValueError(f"Page {page_number} produced no image")
+        return images[0]
+
+    def close(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class PdfiumDocument(PdfDocument):
+    """Rendering with pypdfium2 straight into memory (in a child process with a timeout)."""
+
+    renderer = "pdfium"
+
+    def __init__(self, content: bytes) -> None:
+        import pypdfium2 as pdfium
+
+        self._content = content
+        self._id = next(_doc_ids)
+        # PDF-Bytes für den Render-Prozess, erst beim ersten Render mit Zeitbudget
+        self._shared: Optional[SharedPage] = None
+        with _pdfium_lock:
+            self._pdf = pdfium.PdfDocument(content)
+            self.page_count = len(self._pdf)
+
+    def render_page(self, page_number: int, dpi: int, timeout: Optional[float] = None) -> Image.Image:
+        if timeout is None:
+            with _pdfium_lock:
+                return _render_pdfium(self._pdf, page_number, dpi)
+        with self.render_shared(page_number, dpi, timeout) as page:
+            return Image.fromarray(page.array.copy())
+
+    def render_shared(self, page_number: int, dpi: int, timeout: Optional[float] = None) -> SharedPage:
+        if timeout is None:
+            return super().render_shared(page_number, dpi)
+        if self._shared is None:
+            self._shared = SharedPage((len(self._content),))
+            self._shared.array[...] = np.frombuffer(self._content, dtype=np.uint8)
+        return _render_isolated(self._id, self._shared, page_number, dpi, timeout)
+
+    def close(self) -> None:
+        with _pdfium_lock:
+            if _render_process is not None:
+                _render_process.close_document(self._id)
+            self._pdf.close()
+        if self._shared is not None:
+            self._shared.release()
+            self._shared = None
+
+
+@dataclass
+class PageInfo:
+    """Size of a page in points and, if read, its text-layer character count."""
+
+    width: float
+    height: float
+    text_chars: Optional[int] = None
+
+    def megapixels(self, dpi: int) -> float:
+        """Pixel area when rendered at dpi, capped like PdfiumDocument does."""
+        return min(self.width * self.height * (dpi / 72) ** 2 / 1e6, PAGE_MAX_MEGAPIXELS)
+
+
+def _sample_indices(page_count: int, sample: int) -> list[int]:
+    """Up to `sample` page indices spread evenly over the document."""
+    if page_count <= sample:
+        return list(range(page_count))
+    return sorted({round(i * (page_count - 1) / (sample - 1)) for i in range(sample)})
+
+
+def inspect_pages(content: bytes, text_sample: int) -> list[PageInfo]:
+    """Page sizes and text characters for all pages (pdfplumber: text_sample pages).
+
+    PDFium liest die Größe aus dem Seitenbaum und den Textlayer jeder Seite;
+    gerendert wird nichts, das kostet nur Millisekunden pro Seite. Ohne
+    PDFium über pdfplumber (kommt mit markitdown[pdf]), das Seiten deutlich
+    langsamer parst; dort wird nur eine Stichprobe von text_sample Seiten
+    gelesen, die übrigen behalten text_chars=None."""
+    try:
+        return _inspect_pdfium(content)
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"pdfium could not inspect PDF, falling back to pdfplumber: {str(e)}")
+    return _inspect_pdfplumber(content, text_sample)
+
+
+def _inspect_pdfium(content: bytes) -> list[PageInfo]:
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(content)
+        try:
+            pages = [PageInfo(*pdf.get_page_size(i)) for i in range(len(pdf))]
+            for i in range(len(pages)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                pages[i].text_chars = len(textpage.get_text_range().strip())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+    return pages
+
+
+def _inspect_pdfplumber(content: bytes, text_sample: int) -> list[PageInfo]:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        pages = [PageInfo(float(p.width), float(p.height)) for p in pdf.pages]
+        for i in _sample_indices(len(pages), text_sample):
+            pages[i].text_chars = len((pdf.pages[i].extract_text() or "").strip())
+    return pages
+
+
+def open_document(content: bytes, renderer: str = PDF_RENDERER) -> PdfDocument:
+    """Open a PDF with the configured backend, falling back to pdftoppm."""
+    if renderer == "pdfium":
+        try:
+            return PdfiumDocument(content)
+        except ImportError:
+            print("pypdfium2 not installed, falling back to pdftoppm")
+        except Exception as e:
+            print(f"pdfium could not open PDF, falling back to pdftoppm: {str(e)}")
+    return PopplerDocument(content)
@@ -0,0 +1,87 @@
+"""
+Benannte Extraktionsprofile (Geschwindigkeit vs. Genauigkeit).
+
+Eine schnelle Vorschau braucht weit weniger als ein endgültiger Import. Ein
+Profil bündelt Render-DPI, die Detektions-Kantenbegrenzung, die
+Erkennungs-Batchgröße und die Wahl zwischen Winkelklassifikation pro Zeile
+(use_angle_cls) und einmaliger Seitenorientierung (page_orientation: Seite
+wird aufrecht angenommen, eine Stichprobe von Zeilen klassifiziert und nur
+bei gedrehter Seite rotiert und erneut erkannt).
+
+Mit det_dpi wird zweistufig gearbeitet: Detektion auf einer auf det_dpi
+verkleinerten Kopie, Erkennung auf Ausschnitten der Seite in voller
+Render-DPI (siehe ocr_engine._recognize_two_pass).
+
+Messwerte zu den Profilen liefert `python -m bench.profile_speed` (siehe README).
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+
+@dataclass(frozen=True)
+class ExtractionProfile:
+    name: str
+    dpi: int
+    det_limit_side_len: int
+    rec_batch_num: int
+    use_angle_cls: bool
+    page_orientation: bool
+    det_dpi: Optional[int] = None
+
+
+PROFILES = {
+    # Vorschau: grobes Rendern, Detektion auf kleinem Bild, große Batches.
+    "fast": ExtractionProfile(
+        name="fast",
+        dpi=120,
+        det_limit_side_len=960,
+        rec_batch_num=16,
+        use_angle_cls=False,
+        page_orientation=True,
+    ),
+    # Standard: unverändert das bisherige Verhalten, inklusive
+    # Winkelklassifikation jeder Zeile.
+    "balanced": ExtractionProfile(
+        name="balanced",
+        dpi=200,
+        det_limit_side_len=960,
+        rec_batch_num=6,
+        use_angle_cls=True,
+        page_orientation=False,
+    ),
+    # Endgültiger Import: feines Rendern, Detektion in voller Auflösung,
+    # Winkelklassifikation für jede Zeile.
+    "accurate": ExtractionProfile(
+        name="accurate",
+        dpi=300,
+        det_limit_side_len=2400,
+        rec_batch_num=6,
+        use_angle_cls=True,
+        page_orientation=False,
+    ),
+    # Kleingedrucktes: Detektion auf 120-DPI-Kopie, Erkennung der gefundenen
+    # Zeilen aus der 300-DPI-Seite. Etwa Erkennungsqualität von "accurate",
+    # die Detektion rechnet aber auf einem Sechstel der Pixel.
+    "detail": ExtractionProfile(
+        name="detail",
+        dpi=300,
+        det_limit_side_len=1440,
+        rec_batch_num=6,
+        use_angle_cls=True,
+        page_orientation=False,
+        det_dpi=120,
+    ),
+}
+
+ProfileName = Literal["fast", "balanced", "accurate", "detail"]
+
+DEFAULT_PROFILE = os.getenv("OCR_PROFILE", "balanced")
+if DEFAULT_PROFILE not in PROFILES:
+    raise ValueError(f"OCR_PROFILE must be one of {', '.join(PROFILES)}, got {DEFAULT_PROFILE!r}")
+
+
+def get_profile(name: "str | None") -> ExtractionProfile:
+    """Resolve a request's profile name (None = OCR_PROFILE default)."""
+    return PROFILES[name or DEFAULT_PROFILE]
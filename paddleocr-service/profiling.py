@@ -0,0 +1,180 @@
+"""
+Opt-in-Profiling einzelner Requests.
+
+Pathologisch langsame PDFs lassen sich lokal nicht nachstellen, weil die
+Arbeitsblätter Schülerdaten enthalten. Schickt ein Admin den Header
+`X-Profile` mit dem Profiling-Key (PROFILE_API_KEY, sonst PADDLEOCR_API_KEY),
+wird genau dieser Request mit cProfile aufgezeichnet, inklusive der
+Pipeline-Threads (Rendern, OCR-Verbraucher) und Wandzeiten pro Stufe
+(text-layer, render, ocr, ...). Das Artefakt enthält nur Funktionsnamen und
+Zeiten, keine Dokumentinhalte; es landet in PROFILE_DIR und ist über
+GET /profiles/{id} abrufbar. Ohne konfigurierten Key ist Profiling aus.
+
+OCR in Worker-Prozessen taucht im cProfile nur als Wartezeit auf; die
+Stufenzeiten zeigen, wie viel davon auf die Erkennung entfällt.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+PROFILE_API_KEY = os.getenv("PROFILE_API_KEY") or os.getenv("PADDLEOCR_API_KEY")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "/tmp/meoluna-profiles"))
+
+# Anzahl Funktionen in der JSON-Zusammenfassung
+PROFILE_TOP_FUNCTIONS = 40
+
+# cProfile kann pro Thread nur einmal aktiv sein; ein zweiter gleichzeitiger
+# Profiling-Request wird deshalb normal (ohne Profil) bedient.
+_busy = threading.Lock()
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+def is_authorized(header_value: Optional[str]) -> bool:
+    if not PROFILE_API_KEY or not header_value:
+        return False
+    return hmac.compare_digest(header_value, PROFILE_API_KEY)
+
+
+class RequestProfile:
+    """cProfile data and per-stage wall times of one request."""
+
+    def __init__(self, label: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.started = time.perf_counter()
+        self.stages: dict[str, dict] = {}
+        self._profilers: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+
+    def new_profiler(self) -> cProfile.Profile:
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._profilers.append(profiler)
+        return profiler
+
+    def save(self) -> dict:
+        """Write <id>.prof (pstats, e.g. for snakeviz) and <id>.json (summary)."""
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stats = None
+        for profiler in self._profilers:
+            if stats is None:
+                stats = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+
+        top = ""
+        if stats is not None:
+            stats.dump_stats(str(PROFILE_DIR / f"{self.id}.prof"))
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            top = out.getvalue()
+
+        summary = {
+            "id": self.id,
+            "request": self.label,
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": {
+                name: {"calls": s["calls"], "seconds": round(s["seconds"], 4)}
+                for name, s in self.stages.items()
+            },
+            "top_functions": top,
+        }
+        with open(PROFILE_DIR / f"{self.id}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (shows up in browser dev tools / curl -v)."""
+        return ", ".join(
+            f"{name};dur={s['seconds'] * 1000:.1f}" for name, s in self.stages.items()
+        )
+
+
+@contextmanager
+def profile_request(label: str):
+    """Activate profiling for the current context (request handler).
+
+    Yields None if another profiled request is already running."""
+    if not _busy.acquire(blocking=False):
+        yield None
+        return
+    profile = RequestProfile(label)
+    token = _current.set(profile)
+    profiler = profile.new_profiler()
+    profiler.enable()
+    try:
+        yield profile
+    finally:
+        profiler.disable()
+        _current.reset(token)
+        _busy.release()
+
+
+@contextmanager
+def profile_thread():
+    """Profile a helper thread if its (copied) context belongs to a profiled request."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profiler = profile.new_profiler()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+
+@contextmanager
+def stage(name: str):
+    """Record the wall time of a pipeline stage; no-op outside profiled requests."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_stage(name, time.perf_counter() - start)
+
+
+def load_summary(profile_id: str) -> Optional[dict]:
+    path = _artifact(profile_id, ".json")
+    if path is None:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def pstats_path(profile_id: str) -> Optional[Path]:
+    return _artifact(profile_id, ".prof")
+
+
+def _artifact(profile_id: str, suffix: str) -> Optional[Path]:
+    # Nur Hex-IDs zulassen, damit kein Pfad ausserhalb von PROFILE_DIR entsteht.
+    if not profile_id or any(c not in "0123456789abcdef" for c in profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}{suffix}"
+    return path if path.exists() else None
@@ -0,0 +1,178 @@
+"""
+Kurzer Selbst-Benchmark beim Start.
+
+Railway teilt je nach Deployment unterschiedliche CPU-Klassen zu; sichtbar
+wurde das bisher erst an steigenden Latenzen. Beim Start misst der Dienst
+deshalb einmal OCR- und Textlayer-Durchsatz auf eingebetteten Beispielen
+(ein generiertes Arbeitsblatt-Bild und ein kleines Text-PDF) und meldet die
+Werte in /health. Läuft im Hintergrund-Thread; /health antwortet sofort mit
+status "running".
+
+recognize muss selbst für Threadsicherheit sorgen: main.py übergibt
+recognize_image, das die In-Process-Engine nur unter main.ocr_lock nutzt.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from PIL import Image, ImageDraw, ImageFont
+
+STARTUP_BENCHMARK = os.getenv("STARTUP_BENCHMARK", "1") == "1"
+
+# Gemessene OCR-Seiten (nach einer Aufwärmseite) und Textlayer-Durchläufe
+BENCHMARK_OCR_PAGES = 2
+BENCHMARK_TEXT_LAYER_RUNS = 5
+
+SAMPLE_LINES = [
+    "Arbeitsblatt Mathematik – Klasse 4",
+    "Name: ____________   Datum: ________",
+    "1. Rechne schriftlich: 3.456 + 2.789 =",
+    "2. Löse die Textaufgabe: Jana kauft 4 Äpfel",
+    "   zu je 35 Cent. Wie viel muss sie bezahlen?",
+    "3. Ergänze die Zahlenfolge: 12, 24, 36, __, __",
+    "4. Wie viele Minuten hat eine Viertelstunde?",
+    "5. Größer, kleiner oder gleich? 1 m __ 100 cm",
+    "Deutsch: Setze ein – ß oder ss?",
+    "Die Stra_e ist na_. Wir e_en Grie_brei.",
+    "Schreibe drei Sätze über deine Lieblingsjahreszeit.",
+    "Sachunterricht: Welche Tiere überwintern im Wald?",
+]
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    # DejaVu (fonts-dejavu-core im Dockerfile) hat Umlaute und ß; der
+    # eingebaute Pillow-Font nicht.
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        pass
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow ohne skalierbaren Default-Font
+        return ImageFont.load_default()
+
+
+def sample_page(dpi: int = 200) -> Image.Image:
+    """A4 worksheet-like page rendered at the given DPI."""
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = _font(max(12, dpi // 7))
+    line_height = int(dpi / 7 * 1.8)
+    y = dpi // 2
+    while y < height - dpi:
+        for line in SAMPLE_LINES:
+            draw.text((dpi // 2, y), line, fill="black", font=font)
+            y += line_height
+            if y >= height - dpi:
+                break
+    return image
+
+
+def _pdf_escape(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def sample_text_pdf(pages: int = 3, lines: list[str] = SAMPLE_LINES) -> bytes:
+    """Minimal digital PDF (Helvetica text layer) with `pages` A4 pages."""
+    objects: list[bytes] = []
+    font_id = 3 + 2 * pages
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for i in range(pages):
+        body = b"BT /F1 11 Tf 14 TL 50 800 Td "
+        for _ in range(3):
+            for line in lines:
+                body += b"(" + _pdf_escape(line) + b") Tj T* "
+        body += b"ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+            f"/Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(body) + body + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class SelfBenchmark:
+    """Runs once in the background; result() is what /health reports."""
+
+    def __init__(self) -> None:
+        self._result: dict = {"status": "pending"}
+        self._lock = threading.Lock()
+
+    def result(self) -> dict:
+        with self._lock:
+            return dict(self._result)
+
+    def _set(self, **values) -> None:
+        with self._lock:
+            self._result = values
+
+    def start(
+        self,
+        recognize: Callable[[Image.Image], list[str]],
+        text_layer: Callable[[bytes], object],
+        dpi: int,
+    ) -> None:
+        thread = threading.Thread(
+            target=self.run, args=(recognize, text_layer, dpi), daemon=True
+        )
+        thread.start()
+
+    def run(
+        self,
+        recognize: Callable[[Image.Image], list[str]],
+        text_layer: Callable[[bytes], object],
+        dpi: int,
+    ) -> None:
+        self._set(status="running")
+        try:
+            page = sample_page(dpi)
+            # Aufwärmen: Modell-Laden und erste Inferenz nicht mitmessen.
+            recognize(page.crop((0, 0, page.width, page.height // 8)))
+
+            start = time.perf_counter()
+            lines = 0
+            for _ in range(BENCHMARK_OCR_PAGES):
+                lines += len(recognize(page))
+            ocr_seconds = time.perf_counter() - start
+
+            pdf_pages = 3
+            pdf = sample_text_pdf(pdf_pages)
+            text_layer(pdf)
+            start = time.perf_counter()
+            for _ in range(BENCHMARK_TEXT_LAYER_RUNS):
+                text_layer(pdf)
+            text_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"Startup benchmark failed: {str(e)}")
+            self._set(status="failed", error=str(e))
+            return
+
+        self._set(
+            status="done",
+            ocr_pages_per_sec=round(BENCHMARK_OCR_PAGES / ocr_seconds, 3),
+            ocr_lines_per_sec=round(lines / ocr_seconds, 1),
+            text_layer_pages_per_sec=round(BENCHMARK_TEXT_LAYER_RUNS * pdf_pages / text_seconds, 1),
+            dpi=dpi,
+            cpu_count=os.cpu_count(),
+            measured_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
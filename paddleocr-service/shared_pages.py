@@ -0,0 +1,86 @@
+"""
+Gerenderte Seiten in multiprocessing.shared_memory.
+
+Ein Seitenbild bei 200 DPI hat ~25 MB (RGB). Würde es per Pickle an die
+OCR-Worker geschickt, kostete jede Seite mehrere Kopien und Pipe-Durchsatz.
+Stattdessen schreibt die Rasterisierung einmal in ein Shared-Memory-Segment;
+Worker bekommen nur (Name, Shape, Dtype) und lesen eine NumPy-View darauf.
+
+Das Segment ist referenzgezählt: der Erzeuger hält eine Referenz, jeder
+Verbraucher (z.B. ein laufender OCR-Auftrag) nimmt für seine Dauer eine
+weitere. Bei null wird das Segment geschlossen und freigegeben.
+"""
+
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image
+
+# (Segmentname, Shape, Dtype-String) — alles, was ein Worker zum Anhängen braucht.
+PageDescriptor = tuple[str, tuple[int, ...], str]
+
+
+class SharedPage:
+    """Reference-counted page bitmap backed by a shared memory segment."""
+
+    def __init__(self, shape: tuple[int, ...], dtype=np.uint8) -> None:
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_image(cls, image: Image.Image) -> "SharedPage":
+        """Copy a PIL image (as RGB) straight into a new segment."""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        page = cls((image.height, image.width, 3))
+        page.array[...] = np.asarray(image)
+        return page
+
+    @property
+    def descriptor(self) -> PageDescriptor:
+        return (self._shm.name, self.array.shape, self.array.dtype.str)
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+    def acquire(self) -> "SharedPage":
+        with self._lock:
+            if self._refs <= 0:
+                raise RuntimeError("SharedPage already released")
+            self._refs += 1
+        return self
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        # Eigene View zuerst loslassen, sonst verweigert close() (BufferError).
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedPage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def attach(descriptor: PageDescriptor, writable: bool = False) -> tuple[np.ndarray, shared_memory.SharedMemory]:
+    """Map a page in a worker process as a NumPy view (no copy), read-only by default.
+
+    The caller must drop the view before calling close() on the returned
+    segment; unlinking stays with the owning SharedPage. writable is for
+    producers such as the PDFium render process (pdf_render.py)."""
+    name, shape, dtype = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    view.flags.writeable = writable
+    return view, shm
@@ -0,0 +1,112 @@
+"""
+Queue-Worker für den Extraktions-Service.
+
+Holt Aufträge aus der Job-Queue (siehe job_queue.py), verarbeitet sie mit
+denselben Funktionen wie die synchronen Endpunkte und schreibt das Ergebnis
+zurück. Beliebig viele Worker-Prozesse/-Container können parallel laufen;
+zum Skalieren einfach weitere starten.
+
+Usage:
+    python worker.py [--concurrency 2]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+
+from fastapi import HTTPException
+
+import main
+from job_queue import JobQueue, load_queue
+
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+
+
+def _keep_lease(queue: JobQueue, job_id: str, worker_id: str, done: threading.Event) -> None:
+    """Verlängert die Lease, solange der Job läuft (lange Scans > Lease-Dauer)."""
+    while not done.wait(JOB_LEASE_SECONDS / 3):
+        if not queue.extend_lease(job_id, worker_id, JOB_LEASE_SECONDS):
+            return
+
+
+def process_one(queue: JobQueue, worker_id: str) -> bool:
+    """Claim and run a single job; False when the queue was empty."""
+    job = queue.claim(worker_id, JOB_LEASE_SECONDS)
+    if job is None:
+        return False
+
+    print(f"[{worker_id}] job {job.id} ({job.kind}, {job.filename}, attempt {job.attempts})")
+    done = threading.Event()
+    heartbeat = threading.Thread(
+        target=_keep_lease, args=(queue, job.id, worker_id, done), daemon=True
+    )
+    heartbeat.start()
+    try:
+        response = main.process_job_content(job.kind, job.filename, job.payload, job.params)
+        queue.complete(job.id, worker_id, response.model_dump())
+    except HTTPException as e:
+        queue.fail(job.id, worker_id, str(e.detail), status_code=e.status_code)
+    except Exception as e:
+        print(f"[{worker_id}] job {job.id} failed: {str(e)}")
+        queue.fail(job.id, worker_id, str(e))
+    finally:
+        done.set()
+        heartbeat.join()
+    return True
+
+
+def run(concurrency: int) -> None:
+    queue = load_queue()
+    base_id = f"{socket.gethostname()}-{os.getpid()}"
+    stopping = threading.Event()
+
+    # SIGTERM (Railway/Docker-Stop): laufende Jobs zu Ende bringen, keine neuen holen.
+    def request_stop(signum, frame):
+        print(f"[{base_id}] stopping after current jobs")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    def loop(worker_id: str) -> None:
+        while not stopping.is_set():
+            if not process_one(queue, worker_id):
+                stopping.wait(JOB_POLL_INTERVAL)
+
+    main.start_ocr()
+    if concurrency > 1 and main.pool is None:
+        print(f"[{base_id}] OCR_WORKERS=0: OCR is serialized across the {concurrency} job threads")
+    try:
+        threads = [
+            threading.Thread(target=loop, args=(f"{base_id}-{i}",), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        last_purge = 0.0
+        while any(t.is_alive() for t in threads):
+            # Erledigte Jobs (inkl. Ergebnis) nicht unbegrenzt aufheben.
+            if time.time() - last_purge > 3600:
+                queue.purge(JOB_RETENTION_HOURS * 3600)
+                last_purge = time.time()
+            for thread in threads:
+                thread.join(timeout=1.0)
+    finally:
+        main.stop_ocr()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Meoluna extraction queue worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("JOB_WORKER_CONCURRENCY", "1")),
+        help="Jobs, die dieser Prozess gleichzeitig bearbeitet",
+    )
+    args = parser.parse_args()
+    run(max(1, args.concurrency))
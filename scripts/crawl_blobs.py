@@ -0,0 +1,152 @@
+"""
+Inhaltsadressierter Speicher für gecrawlte PDFs
+
+Jedes PDF liegt genau einmal unter data/curricula/blobs/<aa>/<sha256>.pdf.
+raw/<land>/<name>.pdf ist nur noch eine Ansicht darauf: ein relativer
+Symlink, wo das nicht geht (Windows ohne Entwicklermodus) ein Hardlink,
+als letzter Ausweg eine Kopie. Berlin und Brandenburg verlinken oft
+dieselben Rahmenlehrpläne; sie belegen den Platz dann nur einmal, und
+parse_curriculum_pdfs.py parst sie nur einmal.
+
+Bestehende Parser, die raw/<land>/ lesen, funktionieren unverändert.
+Normale Dateien in raw/ (ältere Läufe, von Hand abgelegt) bleiben, bis
+curriculum_crawler.py --migrate-blobs sie übernimmt. Im Repo eingecheckte
+PDFs bleiben immer normale Dateien: blobs/ ist nicht versioniert, ein
+Symlink dorthin wäre in jedem anderen Checkout kaputt. Sie werden nicht
+übernommen, und ändert sich ihr Inhalt, ist die Ansicht eine Kopie.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_hash(path):
+    """SHA-256 des Inhalts; bei einem Symlink in den Blob-Speicher ohne Lesen
+    (der Hash steht im Dateinamen), sonst über die Datei selbst"""
+    path = Path(path)
+    if path.is_symlink():
+        target = Path(os.readlink(path))
+        if target.parent.parent.name == "blobs" and len(target.stem) == 64:
+            return target.stem
+    return file_sha256(path)
+
+
+def git_tracked(directory):
+    """Von git verfolgte Dateien unter directory (leer ohne git oder Repo)"""
+    directory = Path(directory)
+    try:
+        out = subprocess.run(
+            ["git", "ls-files", "-z"], cwd=directory,
+            capture_output=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return set()
+    return {directory / name for name in out.decode("utf-8", "surrogateescape").split("\0") if name}
+
+
+class BlobStore:
+    """PDFs nach SHA-256 abgelegt, mit Ansichten pro Bundesland
+
+    Ansichten in keep (eingecheckte Dateien) werden als Kopie geschrieben,
+    nie als Link."""
+
+    def __init__(self, root, keep=()):
+        self.root = Path(root)
+        self.keep = set(keep)
+
+    def path(self, sha256):
+        return self.root / sha256[:2] / f"{sha256}.pdf"
+
+    def put(self, source, sha256):
+        """Fertige Datei unter ihrem Hash ablegen (verschoben, nicht kopiert)
+
+        Liegt derselbe Inhalt schon vor, wird source nur gelöscht."""
+        blob = self.path(sha256)
+        if blob.exists():
+            Path(source).unlink()
+            return blob
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, blob)
+        return blob
+
+    def link(self, sha256, view):
+        """view (z.B. raw/berlin/x.pdf) auf den Blob zeigen lassen
+
+        Atomar über eine temporäre Ansicht und os.replace; eine bestehende
+        Ansicht auf einen alten Stand wird dabei ersetzt."""
+        blob = self.path(sha256)
+        view = Path(view)
+        if view.exists() and os.path.samefile(view, blob):
+            return
+        if view in self.keep and view.is_file() and view.stat().st_size == blob.stat().st_size \
+                and file_sha256(view) == sha256:
+            return
+        view.parent.mkdir(parents=True, exist_ok=True)
+        tmp = view.with_name(view.name + ".link")
+        tmp.unlink(missing_ok=True)
+        if view in self.keep:
+            shutil.copyfile(blob, tmp)
+            os.replace(tmp, view)
+            return
+        try:
+            os.symlink(os.path.relpath(blob, view.parent), tmp)
+        except (OSError, NotImplementedError):
+            try:
+                os.link(blob, tmp)
+            except OSError:
+                shutil.copyfile(blob, tmp)
+        os.replace(tmp, view)
+
+    def gc(self, referenced):
+        """Blobs löschen, auf die nichts mehr zeigt
+
+        referenced: Hashes, die die Frontier oder eine Symlink-Ansicht noch
+        braucht. Blobs mit Hardlink-Ansicht (st_nlink > 1) bleiben ohnehin;
+        Kopien hängen nicht am Blob. Gibt (Anzahl, Bytes) zurück."""
+        removed = freed = 0
+        for blob in self.root.glob("*/*.pdf"):
+            if blob.stem in referenced:
+                continue
+            stat = blob.stat()
+            if stat.st_nlink > 1:
+                continue
+            blob.unlink()
+            removed += 1
+            freed += stat.st_size
+        for prefix in self.root.glob("*/"):
+            if not any(prefix.iterdir()):
+                prefix.rmdir()
+        return removed, freed
+
+    @staticmethod
+    def is_view(path):
+        """Symlink oder Hardlink, also bereits eine Ansicht auf einen Blob"""
+        path = Path(path)
+        return path.is_symlink() or os.stat(path).st_nlink > 1
+
+    def adopt(self, view):
+        """Eine normale Datei (aus einem Lauf vor dem Blob-Speicher) übernehmen:
+        in den Speicher verschieben und durch eine Ansicht ersetzen
+
+        Gibt den Hash zurück."""
+        view = Path(view)
+        sha256 = file_sha256(view)
+        blob = self.path(sha256)
+        if blob.exists():
+            view.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(view, blob)
+        self.link(sha256, view)
+        return sha256
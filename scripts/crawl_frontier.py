@@ -0,0 +1,331 @@
+"""
+Persistente Crawl-Frontier für den Curriculum-Crawler
+
+Alle entdeckten URLs liegen in einer SQLite-Datenbank
+(data/curricula/frontier.db), nicht im Aufrufstapel. Jede URL steht dort
+genau einmal (Schlüssel: normalisierte URL), mit eigener Tiefe und eigener
+max_depth. Ein abgebrochener Crawl setzt beim nächsten Start genau an der
+Stelle fort, an der er stand: Einträge "in_progress" gehen zurück auf
+"pending", fertige bleiben fertig.
+
+Reihenfolge: "bfs" (Tiefe, dann Entdeckungsreihenfolge) oder "priority"
+(höhere Priorität zuerst, dann wie bfs).
+
+Inkrementell (revisit_after in Sekunden): Zu jeder URL stehen ETag,
+Last-Modified und SHA-256 des letzten Abrufs. Fertige Einträge, deren
+letzter Abruf länger als revisit_after zurückliegt, kommen beim Start
+wieder in die Warteschlange und werden bedingt abgefragt. Hat sich ein PDF
+geändert, wird es mit needs_parse markiert, bis der Parser es abhakt.
+
+Jede URL wird nur einmal abgerufen, auch wenn mehrere Bundesländer sie
+verlinken; die Tabelle lands hält fest, welche das sind (für die Ansichten
+in crawl_blobs.py).
+"""
+
+import re
+import sqlite3
+import time
+from urllib.parse import quote, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Fehlgeschlagene Einträge werden bei einem neuen Lauf so oft erneut versucht
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    host TEXT NOT NULL,
+    land TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    max_depth INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL DEFAULT '',
+    source_page TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    added_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (state, priority, depth, seq);
+-- Alle Bundesländer, in denen eine URL gefunden wurde (frontier.land ist nur das erste)
+CREATE TABLE IF NOT EXISTS lands (
+    url TEXT NOT NULL,
+    land TEXT NOT NULL,
+    PRIMARY KEY (url, land)
+);
+"""
+
+# Spalten des letzten erfolgreichen Abrufs und eines unterbrochenen Downloads
+# (auch in älteren frontier.db nachgerüstet)
+FETCH_COLUMNS = {
+    "etag": "TEXT",
+    "last_modified": "TEXT",
+    "sha256": "TEXT",
+    "size": "INTEGER",
+    "file": "TEXT",
+    "fetched_at": "REAL",
+    "changed_at": "REAL",
+    "needs_parse": "INTEGER NOT NULL DEFAULT 0",
+    "partial_validator": "TEXT",
+}
+
+ORDERS = {
+    "bfs": "depth, seq",
+    "priority": "priority DESC, depth, seq",
+}
+
+
+# RFC 3986, 2.3: nur diese Zeichen dürfen aus %XX dekodiert werden
+UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+
+
+def _normalize_escape(match):
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else "%" + match.group(1).upper()
+
+
+def _remove_dot_segments(path):
+    """"." und ".." auflösen (RFC 3986, 5.2.4); doppelte Slashes bleiben"""
+    output = []
+    for segment in path.split("/")[1:]:
+        if segment == "..":
+            if len(output) > 0:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if path.rsplit("/", 1)[-1] in (".", ".."):
+        output.append("")
+    return "/" + "/".join(output)
+
+
+def _normalize_path(path):
+    if not path:
+        return "/"
+    # Rohe Zeichen, die in einer URL nicht stehen dürfen (Leerzeichen,
+    # Umlaute aus href), kodieren wie ein Browser; vorhandene Escapes bleiben.
+    path = quote(path, safe="/%:@!$&'()*+,;=-._~")
+    # Escapes vereinheitlichen: Hex groß, nur ungeschützte Zeichen dekodieren
+    # (%7e und ~ sind dieselbe URL, %2F und / nicht). Nie als UTF-8
+    # dekodieren: %E4 (Latin-1) muss genau so beim Server ankommen.
+    path = PERCENT_ESCAPE.sub(_normalize_escape, path)
+    if not path.startswith("/"):
+        path = "/" + path
+    return _remove_dot_segments(path)
+
+
+def normalize_url(url):
+    """Kanonische Form einer URL für die Deduplizierung
+
+    Schema und Host klein, Standard-Port und Fragment entfernt,
+    Punkt-Segmente aufgelöst, Prozent-Kodierung vereinheitlicht (ohne
+    etwas zu dekodieren, das die URL ändert). Userinfo und Query bleiben
+    unverändert (Reihenfolge kann für den Server eine Rolle spielen)."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    if at:
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, _normalize_path(parts.path), parts.query, ""))
+
+
+class Frontier:
+    """Deduplizierte Warteschlange der zu crawlenden Seiten und PDFs"""
+
+    def __init__(self, path, order="bfs", revisit_after=None):
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        self.order = ORDERS[order]
+        self.revisit_after = revisit_after
+        # isolation_level=None: jede Änderung ist sofort committed (crash-sicher)
+        self.db = sqlite3.connect(str(path), isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        existing = {row["name"] for row in self.db.execute("PRAGMA table_info(frontier)")}
+        for column, definition in FETCH_COLUMNS.items():
+            if column not in existing:
+                self.db.execute(f"ALTER TABLE frontier ADD COLUMN {column} {definition}")
+
+    @property
+    def incremental(self):
+        return self.revisit_after is not None
+
+    def close(self):
+        self.db.close()
+
+    def resume(self):
+        """Nach Abbruch: laufende Einträge zurück in die Warteschlange,
+        fehlgeschlagene erneut versuchen (bis MAX_ATTEMPTS); inkrementell
+        zusätzlich alle, deren letzter Abruf älter als revisit_after ist"""
+        now = time.time()
+        if self.incremental:
+            self.db.execute(
+                "UPDATE frontier SET state = 'pending', attempts = 0, updated_at = ? "
+                "WHERE state IN ('done', 'failed') AND coalesce(fetched_at, updated_at) < ?",
+                (now, now - self.revisit_after),
+            )
+        self.db.execute(
+            "UPDATE frontier SET state = 'pending', updated_at = ? WHERE state = 'in_progress'", (now,)
+        )
+        self.db.execute(
+            "UPDATE frontier SET state = 'pending', updated_at = ? WHERE state = 'failed' AND attempts < ?",
+            (now, MAX_ATTEMPTS),
+        )
+
+    def reset(self):
+        """Frontier leeren (neuer Crawl von den Start-URLs)"""
+        self.db.execute("DELETE FROM frontier")
+        self.db.execute("DELETE FROM lands")
+
+    def add(self, url, land, kind, depth, max_depth, priority=0, text="", source_page=None):
+        """URL einreihen; True, wenn sie neu war
+
+        Wird eine noch wartende URL auf kürzerem Weg erneut gefunden, gilt
+        die kleinere Tiefe (sonst könnte max_depth zu früh greifen)."""
+        url = normalize_url(url)
+        now = time.time()
+        self.db.execute("INSERT OR IGNORE INTO lands (url, land) VALUES (?, ?)", (url, land))
+        row = self.db.execute("SELECT seq, state, depth FROM frontier WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            if row["state"] == "pending" and depth < row["depth"]:
+                self.db.execute(
+                    "UPDATE frontier SET depth = ?, max_depth = max(max_depth, ?), updated_at = ? WHERE seq = ?",
+                    (depth, max_depth, now, row["seq"]),
+                )
+            return False
+        self.db.execute(
+            """
+            INSERT INTO frontier (url, host, land, kind, depth, max_depth, priority, text,
+                                  source_page, added_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (url, urlsplit(url).netloc, land, kind, depth, max_depth, priority, text, source_page, now, now),
+        )
+        return True
+
+    def claim(self, skip_hosts=()):
+        """Nächsten wartenden Eintrag holen und als in_progress markieren
+
+        skip_hosts: Hosts, die gerade ausgelastet sind (async-Modus)."""
+        skip_hosts = list(skip_hosts)
+        placeholders = ",".join("?" * len(skip_hosts))
+        where = f"AND host NOT IN ({placeholders})" if skip_hosts else ""
+        row = self.db.execute(
+            f"SELECT * FROM frontier WHERE state = 'pending' {where} ORDER BY {self.order} LIMIT 1",
+            skip_hosts,
+        ).fetchone()
+        if row is None:
+            return None
+        self.db.execute(
+            "UPDATE frontier SET state = 'in_progress', updated_at = ? WHERE seq = ?",
+            (time.time(), row["seq"]),
+        )
+        return dict(row)
+
+    def done(self, entry):
+        self.db.execute(
+            "UPDATE frontier SET state = 'done', error = NULL, updated_at = ? WHERE seq = ?",
+            (time.time(), entry["seq"]),
+        )
+
+    def failed(self, entry, error):
+        self.db.execute(
+            "UPDATE frontier SET state = 'failed', attempts = attempts + 1, error = ?, updated_at = ? "
+            "WHERE seq = ?",
+            (str(error), time.time(), entry["seq"]),
+        )
+
+    def record_fetch(self, entry, etag, last_modified, sha256, size, file=None):
+        """Ergebnis eines Abrufs mit Inhalt speichern; True, wenn der Inhalt
+        neu ist oder sich gegenüber dem letzten Abruf geändert hat
+
+        Geänderte PDFs bekommen needs_parse (für parse_curriculum_pdfs.py)."""
+        changed = sha256 != entry.get("sha256")
+        now = time.time()
+        self.db.execute(
+            """
+            UPDATE frontier SET etag = ?, last_modified = ?, sha256 = ?, size = ?,
+                   file = coalesce(?, file), fetched_at = ?,
+                   changed_at = CASE WHEN ? THEN ? ELSE changed_at END,
+                   needs_parse = CASE WHEN ? AND kind = 'pdf' THEN 1 ELSE needs_parse END,
+                   partial_validator = NULL, updated_at = ?
+            WHERE seq = ?
+            """,
+            (etag, last_modified, sha256, size, file, now, changed, now, changed, now, entry["seq"]),
+        )
+        return changed
+
+    def not_modified(self, entry):
+        """304 bzw. unveränderter Inhalt: nur den Zeitpunkt der Prüfung festhalten"""
+        now = time.time()
+        self.db.execute(
+            "UPDATE frontier SET fetched_at = ?, partial_validator = NULL, updated_at = ? WHERE seq = ?",
+            (now, now, entry["seq"]),
+        )
+
+    def partial(self, entry, validator):
+        """Validator (ETag oder Last-Modified) der Version, die gerade in
+        <datei>.part geladen wird; nötig für If-Range beim Fortsetzen"""
+        entry["partial_validator"] = validator
+        self.db.execute(
+            "UPDATE frontier SET partial_validator = ?, updated_at = ? WHERE seq = ?",
+            (validator, time.time(), entry["seq"]),
+        )
+
+    def needs_parse(self):
+        """PDFs, die seit dem letzten Parsen neu sind oder sich geändert haben"""
+        return [
+            dict(row)
+            for row in self.db.execute(
+                "SELECT * FROM frontier WHERE kind = 'pdf' AND needs_parse = 1 AND file IS NOT NULL ORDER BY seq"
+            )
+        ]
+
+    def parsed(self, entry):
+        """PDF ist geparst; needs_parse zurücksetzen"""
+        self.db.execute(
+            "UPDATE frontier SET needs_parse = 0, updated_at = ? WHERE seq = ?", (time.time(), entry["seq"])
+        )
+
+    def lands(self, url):
+        """Bundesländer, in denen die URL gefunden wurde"""
+        url = normalize_url(url)
+        return sorted(
+            row[0]
+            for row in self.db.execute(
+                "SELECT land FROM lands WHERE url = ? UNION SELECT land FROM frontier WHERE url = ?", (url, url)
+            )
+        )
+
+    def documents(self):
+        """Geladene PDFs mit Hash: (Eintrag, Bundesländer)"""
+        return [
+            (dict(row), self.lands(row["url"]))
+            for row in self.db.execute(
+                "SELECT * FROM frontier WHERE kind = 'pdf' AND sha256 IS NOT NULL AND file IS NOT NULL ORDER BY seq"
+            )
+        ]
+
+    def total(self, kind):
+        """Anzahl Einträge einer Art ("page" oder "pdf")"""
+        return self.db.execute("SELECT count(*) FROM frontier WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def counts(self):
+        """Anzahl Einträge je Zustand"""
+        return {
+            row["state"]: row["n"]
+            for row in self.db.execute("SELECT state, count(*) AS n FROM frontier GROUP BY state")
+        }
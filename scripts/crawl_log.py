@@ -0,0 +1,112 @@
+"""
+Crawl-Log des Curriculum-Crawlers
+
+Früher stand das Log in data/curricula/crawl_log.json und wurde bei jedem
+Zwischenspeichern komplett neu geschrieben: Kosten wachsen mit dem Log, und
+ein Absturz mitten im Schreiben hinterlässt eine kaputte Datei. Jetzt liegt
+es in SQLite (data/curricula/crawl_log.db, WAL): jeder Eintrag ist ein
+einzelnes INSERT, sofort committed, und "schon gecrawlt?" ist ein
+Index-Lookup über den URL-Hash.
+
+Ein vorhandenes crawl_log.json wird beim ersten Start übernommen
+(import_json) und danach nicht mehr geschrieben.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawled (
+    url_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    land TEXT,
+    time TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS errors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    error TEXT NOT NULL,
+    time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS errors_url ON errors (url);
+CREATE TABLE IF NOT EXISTS runs (
+    time TEXT NOT NULL
+);
+"""
+
+
+class CrawlLog:
+    """Gecrawlte URLs (nach URL-Hash) und Fehler, Eintrag für Eintrag persistiert"""
+
+    def __init__(self, path):
+        # isolation_level=None: jede Änderung ist sofort committed (crash-sicher)
+        self.db = sqlite3.connect(str(path), isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __contains__(self, url_hash):
+        return self.db.execute("SELECT 1 FROM crawled WHERE url_hash = ?", (url_hash,)).fetchone() is not None
+
+    def get(self, url_hash):
+        row = self.db.execute("SELECT record FROM crawled WHERE url_hash = ?", (url_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, url_hash, record):
+        """Gecrawlte URL eintragen (ersetzt einen älteren Eintrag derselben URL)"""
+        record = {"time": datetime.now().isoformat(), **record}
+        self.db.execute(
+            "INSERT OR REPLACE INTO crawled (url_hash, url, land, time, record) VALUES (?, ?, ?, ?, ?)",
+            (url_hash, record["url"], record.get("land"), record["time"], json.dumps(record, ensure_ascii=False)),
+        )
+
+    def error(self, url, error, time=None):
+        self.db.execute(
+            "INSERT INTO errors (url, error, time) VALUES (?, ?, ?)",
+            (url, str(error), time or datetime.now().isoformat()),
+        )
+
+    def run(self):
+        """Start eines Laufs festhalten (entspricht last_run im alten JSON)"""
+        self.db.execute("INSERT INTO runs (time) VALUES (?)", (datetime.now().isoformat(),))
+
+    def counts(self):
+        return {
+            table: self.db.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("crawled", "errors", "runs")
+        }
+
+    def import_json(self, path):
+        """Einträge aus einem alten crawl_log.json übernehmen (in einer Transaktion)
+
+        Nur, solange das SQLite-Log leer ist; gibt die Zahl der
+        übernommenen URLs zurück."""
+        if self.counts()["crawled"]:
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        last_run = old.get("last_run") or []
+        self.db.execute("BEGIN")
+        try:
+            for url_hash, record in old.get("crawled", {}).items():
+                self.db.execute(
+                    "INSERT OR REPLACE INTO crawled (url_hash, url, land, time, record) VALUES (?, ?, ?, ?, ?)",
+                    (url_hash, record["url"], record.get("land"), record.get("time", ""),
+                     json.dumps(record, ensure_ascii=False)),
+                )
+            for error in old.get("errors", []):
+                self.db.execute(
+                    "INSERT INTO errors (url, error, time) VALUES (?, ?, ?)",
+                    (error.get("url", ""), error.get("error", ""), error.get("time", "")),
+                )
+            for time in last_run if isinstance(last_run, list) else [last_run]:
+                self.db.execute("INSERT INTO runs (time) VALUES (?)", (time,))
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return len(old.get("crawled", {}))
@@ -2,6 +2,32 @@
 """
 Schulcurricula Crawler für Meoluna
 Sammelt Lehrpläne aller 16 Bundesländer
+
+    python scripts/curriculum_crawler.py                 # sequentiell (requests)
+    python scripts/curriculum_crawler.py --async         # parallel (httpx)
+
+Der async-Modus crawlt alle Bundesländer gleichzeitig über einen
+gemeinsamen httpx-Client mit Keep-Alive-Verbindungen. Pro Host begrenzen
+--per-host (gleichzeitige Requests) und --rate (Requests pro Sekunde) die
+Last; bei 429/503 wartet der Host Retry-After ab und wird langsamer.
+BUNDESLAENDER, is_relevant_link und das Crawl-Log gelten unverändert.
+
+Entdeckte URLs stehen in einer persistenten Frontier (crawl_frontier.py,
+data/curricula/frontier.db): jede URL einmal, mit eigener Tiefe, in
+Breitensuche- oder Prioritätsreihenfolge (--order). Ein abgebrochener Crawl
+setzt beim nächsten Start dort fort; --restart beginnt neu bei den
+Start-URLs.
+
+--incremental fragt alle URLs, deren letzter Abruf älter als --max-age
+Tage ist, erneut ab: bedingt (If-None-Match/If-Modified-Since), mit
+Inhalts-Hash als Rückfall. Nur geänderte PDFs werden neu geschrieben und
+für parse_curriculum_pdfs.py --changed markiert.
+
+PDFs liegen einmal pro Inhalt in blobs/ (crawl_blobs.py); raw/<land>/ enthält
+Ansichten darauf für jedes Bundesland, das die URL verlinkt.
+
+Das Crawl-Log (crawl_log.py, data/curricula/crawl_log.db) schreibt jeden
+Eintrag einzeln und sofort; ein altes crawl_log.json wird übernommen.
 """
 
 import sys
@@ -9,21 +35,44 @@ import sys
 sys.stdout.reconfigure(line_buffering=True)
 
 import os
-import json
+import argparse
+import asyncio
 import time
 import hashlib
 import requests
+from contextlib import asynccontextmanager
 from pathlib import Path
-from datetime import datetime
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
 
+from crawl_blobs import BlobStore, content_hash, file_sha256, git_tracked
+from crawl_frontier import Frontier
+from crawl_log import CrawlLog
+
 # Basis-Konfiguration
 BASE_DIR = Path(__file__).parent.parent / "data" / "curricula"
 RAW_DIR = BASE_DIR / "raw"
 PARSED_DIR = BASE_DIR / "parsed"
-LOG_FILE = BASE_DIR / "crawl_log.json"
+LOG_FILE = BASE_DIR / "crawl_log.db"
+LEGACY_LOG_FILE = BASE_DIR / "crawl_log.json"
+FRONTIER_FILE = BASE_DIR / "frontier.db"
+BLOB_DIR = BASE_DIR / "blobs"
+
+# Standard-Tiefe ab den Start-URLs; ein Bundesland kann "max_depth" setzen
+MAX_DEPTH = 2
+
+# --incremental: URLs nach so vielen Tagen erneut abfragen
+MAX_AGE_DAYS = 7
+
+# PDFs werden in Stücken dieser Größe gestreamt; größere Dateien bricht der
+# Crawler ab (--max-pdf-mb)
+CHUNK_SIZE = 256 * 1024
+MAX_PDF_MB = 200
+MB = 1024 * 1024
+
+# Byte-Offsets für Range gelten nur ohne Content-Encoding
+PDF_HEADERS = {"Accept-Encoding": "identity"}
 
 # User Agent um nicht geblockt zu werden
 HEADERS = {
@@ -177,23 +226,20 @@ def setup_directories():
     """Erstelle notwendige Verzeichnisse"""
     RAW_DIR.mkdir(parents=True, exist_ok=True)
     PARSED_DIR.mkdir(parents=True, exist_ok=True)
+    BLOB_DIR.mkdir(parents=True, exist_ok=True)
     for land in BUNDESLAENDER.keys():
         (RAW_DIR / land).mkdir(exist_ok=True)
 
 
 def load_log():
-    """Lade Crawl-Log"""
-    if LOG_FILE.exists():
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"crawled": {}, "errors": [], "last_run": None}
-
-
-def save_log(log):
-    """Speichere Crawl-Log"""
-    log["last_run"] = datetime.now().isoformat()
-    with open(LOG_FILE, "w", encoding="utf-8") as f:
-        json.dump(log, f, indent=2, ensure_ascii=False)
+    """Öffne das Crawl-Log; ein altes crawl_log.json wird einmalig übernommen"""
+    log = CrawlLog(LOG_FILE)
+    if LEGACY_LOG_FILE.exists():
+        imported = log.import_json(LEGACY_LOG_FILE)
+        if imported:
+            print(f"[LOG] {imported} Einträge aus {LEGACY_LOG_FILE.name} übernommen")
+    log.run()
+    return log
 
 
 def get_url_hash(url):
@@ -233,149 +279,623 @@ def is_relevant_link(href, text):
     return False
 
 
-def crawl_page(url, land_key, log, depth=0, max_depth=2):
+def relevant_links(html, url):
+    """Relevante Links einer HTML-Seite als (absolute URL, Linktext)"""
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for link in soup.find_all("a", href=True):
+        href = link.get("href")
+        text = link.get_text(strip=True)
+
+        # Relative URLs auflösen
+        full_url = urljoin(url, href)
+
+        if is_relevant_link(full_url, text):
+            links.append((full_url, text))
+    return links
+
+
+# Begriffe, die auf einen Lehrplan selbst (nicht nur die Schule) hinweisen
+PRIORITY_KEYWORDS = [
+    "lehrplan", "rahmenlehrplan", "kerncurriculum", "bildungsplan",
+    "rahmenplan", "curriculum", "fachanforderung",
+]
+
+
+def link_priority(url, text):
+    """Priorität eines Links für --order priority (höher = früher)"""
+    combined = url.lower() + " " + (text or "").lower()
+    return (
+        2 * sum(1 for kw in PRIORITY_KEYWORDS if kw in combined)
+        + sum(1 for kw in FAECHER_KEYWORDS if kw in combined)
+    )
+
+
+def seed_frontier(frontier, max_depth=MAX_DEPTH):
+    """Start-URLs aller Bundesländer einreihen (bereits bekannte bleiben unverändert)
+
+    Ob eine URL schon gecrawlt ist, weiß allein die Frontier; nach
+    --restart ist sie leer, und alles wird neu gecrawlt."""
+    for land_key, land_info in BUNDESLAENDER.items():
+        for url in land_info["lehrplan_urls"]:
+            frontier.add(
+                url, land_key, "page", depth=0,
+                max_depth=land_info.get("max_depth", max_depth),
+                priority=100,
+            )
+
+
+def enqueue_links(frontier, entry, links):
+    """Relevante Links einer Seite einreihen: PDFs immer, Seiten bis max_depth
+
+    Die Links gelten für jedes Bundesland, in dem die Seite gefunden wurde."""
+    lands = frontier.lands(entry["url"])
+    for full_url, text in links:
+        if full_url.lower().endswith(".pdf"):
+            kind = "pdf"
+        elif entry["depth"] < entry["max_depth"]:
+            kind = "page"
+        else:
+            continue
+        for land in lands:
+            frontier.add(
+                full_url, land, kind, entry["depth"] + 1, entry["max_depth"],
+                priority=link_priority(full_url, text), text=text, source_page=entry["url"],
+            )
+
+
+def conditional_headers(entry):
+    """Validatoren des letzten Abrufs als If-None-Match/If-Modified-Since"""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def record_page(entry, response, frontier):
+    """Validatoren und Hash einer Seite speichern; False bei 304 (nichts zu parsen)"""
+    if response.status_code == 304:
+        frontier.not_modified(entry)
+        return False
+    content = response.content
+    frontier.record_fetch(
+        entry, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+        hashlib.sha256(content).hexdigest(), len(content),
+    )
+    return True
+
+
+class PDFTooLarge(Exception):
+    pass
+
+
+class PartFile:
     """
-    Crawle eine Seite und extrahiere relevante Links
+    Download eines PDFs nach <datei>.part: Stück für Stück schreiben und
+    hashen, erst vollständig per os.replace in den Blob-Speicher. Ein
+    abgebrochener Download bleibt liegen und wird per Range fortgesetzt.
     """
-    if depth > max_depth:
-        return []
-    
-    url_hash = get_url_hash(url)
-    if url_hash in log["crawled"]:
-        print(f"  [SKIP] Bereits gecrawlt: {url[:60]}...")
-        return []
+
+    def __init__(self, filepath, max_bytes):
+        self.filepath = filepath
+        self.path = filepath.with_name(filepath.name + ".part")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.sha256 = None
+        self._file = None
+
+    def range_headers(self, entry):
+        """Range/If-Range für einen vorhandenen Teil-Download, sonst {}"""
+        validator = entry.get("partial_validator")
+        if not validator or not self.path.exists():
+            return {}
+        return {"Range": f"bytes={self.path.stat().st_size}-", "If-Range": validator}
+
+    def begin(self, entry, response, frontier):
+        """Antwort-Header prüfen und die Teil-Datei öffnen (206: anhängen, sonst neu)"""
+        offset = self.path.stat().st_size if self.path.exists() else 0
+        resume = response.status_code == 206
+        if resume and not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+            self.discard()
+            raise ValueError(f"unerwartetes Content-Range: {response.headers.get('Content-Range')}")
+        
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and (offset if resume else 0) + int(length) > self.max_bytes:
+            self.discard()
+            raise PDFTooLarge(f"{int(length) / MB:.0f} MB > {self.max_bytes / MB:.0f} MB")
+        
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        if resume:
+            print(f"  [RESUME] {self.filepath.name} ab {offset / MB:.1f} MB")
+            self.load()
+        
+        # Nur mit starkem ETag oder Last-Modified lässt sich später fortsetzen
+        etag = response.headers.get("ETag")
+        validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+        frontier.partial(entry, validator)
+        self._file = open(self.path, "ab" if resume else "wb")
+
+    def load(self):
+        """Vorhandenen Teil hashen (Fortsetzen oder Übernehmen ohne neue Daten)"""
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                self.sha256.update(chunk)
+                self.size += len(chunk)
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.discard()
+            raise PDFTooLarge(f"mehr als {self.max_bytes / MB:.0f} MB")
+        self.sha256.update(chunk)
+        self._file.write(chunk)
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def finish_unsatisfiable_range(entry, response, part, frontier, log):
+    """416 auf einen Range-Request
+
+    Meist ist der Teil schon vollständig (Abbruch nach dem letzten Byte,
+    vor dem Umbenennen). Nennt Content-Range ("bytes */<gesamt>") genau
+    seine Länge, wird er übernommen. Sonst wird er verworfen und None
+    zurückgegeben: der Aufrufer fragt dann ohne Range neu an."""
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    if total.isdigit() and int(total) == part.path.stat().st_size:
+        part.load()
+        validator = entry["partial_validator"]
+        # ETags stehen in Anführungszeichen, sonst ist es ein Last-Modified-Datum
+        headers = {"ETag": validator} if validator.startswith('"') else {"Last-Modified": validator}
+        return finish_pdf(entry, headers, part, frontier, log)
+    print(f"  [RESTART] {part.filepath.name}: Teil-Download passt nicht mehr")
+    part.discard()
+    frontier.partial(entry, None)
+    return None
+
+
+_blob_stores = {}
+
+
+def blob_store():
+    """BlobStore mit den eingecheckten PDFs in raw/ als keep (einmal je Lauf)"""
+    key = (BLOB_DIR, RAW_DIR)
+    if key not in _blob_stores:
+        _blob_stores[key] = BlobStore(BLOB_DIR, git_tracked(RAW_DIR))
+    return _blob_stores[key]
+
+
+def finish_pdf(entry, headers, part, frontier, log):
+    """Vollständigen Download übernehmen, falls neu oder geändert
+
+    Gibt "new", "changed" oder "unchanged" zurück. Unveränderte Dateien
+    werden nicht neu geschrieben und nicht zum Parsen markiert. Neue Inhalte
+    kommen in den Blob-Speicher, mit einer Ansicht je Bundesland."""
+    url = entry["url"]
+    filepath = part.filepath
+    existed = filepath.exists()
+    if entry["sha256"] is None and existed:
+        # Datei aus einem Lauf vor den Hashes: mit dem Stand auf der Platte vergleichen
+        entry["sha256"] = file_sha256(filepath)
+    changed = frontier.record_fetch(
+        entry, headers.get("ETag"), headers.get("Last-Modified"),
+        part.sha256.hexdigest(), part.size, str(filepath),
+    )
+    if not changed:
+        part.discard()
+        return "unchanged"
     
-    print(f"  [CRAWL] {url[:80]}...")
+    store = blob_store()
+    sha256 = part.sha256.hexdigest()
+    store.put(part.path, sha256)
+    for land in frontier.lands(url):
+        store.link(sha256, pdf_filepath(url, land))
+    log.add(get_url_hash(url), {
+        "url": url,
+        "land": entry["land"],
+        "file": str(filepath),
+        "size": part.size,
+        "text": entry.get("text", ""),
+    })
+    return "changed" if existed else "new"
+
+
+def mark_crawled(url, land_key, log, status):
+    log.add(get_url_hash(url), {
+        "url": url,
+        "land": land_key,
+        "status": status,
+    })
+
+
+def crawl_page(entry, frontier, log):
+    """
+    Crawle eine Seite aus der Frontier und reihe ihre relevanten Links ein
+    """
+    url = entry["url"]
+    print(f"  [CRAWL] [{entry['land']}] {url[:80]}...")
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
+        response = requests.get(url, headers={**HEADERS, **conditional_headers(entry)}, timeout=30)
         response.raise_for_status()
     except Exception as e:
-        log["errors"].append({"url": url, "error": str(e), "time": datetime.now().isoformat()})
+        log.error(url, e)
         print(f"  [ERROR] {e}")
-        return []
+        frontier.failed(entry, e)
+        return
     
     # Markiere als gecrawlt
-    log["crawled"][url_hash] = {
-        "url": url,
-        "land": land_key,
-        "time": datetime.now().isoformat(),
-        "status": response.status_code,
-    }
-    
-    found_pdfs = []
-    
-    # HTML parsen
-    soup = BeautifulSoup(response.text, "html.parser")
-    
-    # Finde alle Links
-    for link in soup.find_all("a", href=True):
-        href = link.get("href")
-        text = link.get_text(strip=True)
-        
-        # Relative URLs auflösen
-        full_url = urljoin(url, href)
-        
-        # Prüfe Relevanz
-        if is_relevant_link(full_url, text):
-            if full_url.lower().endswith(".pdf"):
-                found_pdfs.append({
-                    "url": full_url,
-                    "text": text,
-                    "source_page": url,
-                })
-            elif depth < max_depth:
-                # Rekursiv weiter crawlen (nur HTML)
-                time.sleep(0.5)  # Rate limiting
-                found_pdfs.extend(crawl_page(full_url, land_key, log, depth + 1, max_depth))
-    
-    return found_pdfs
+    mark_crawled(url, entry["land"], log, response.status_code)
+    if record_page(entry, response, frontier):
+        enqueue_links(frontier, entry, relevant_links(response.text, url))
+    frontier.done(entry)
 
 
-def download_pdf(pdf_info, land_key, log):
-    """Lade PDF herunter"""
-    url = pdf_info["url"]
-    url_hash = get_url_hash(url)
-    
+def pdf_filepath(url, land_key):
+    """Zielpfad eines PDFs unter raw/<land>/"""
     # Dateiname aus URL oder Text generieren
     filename = urlparse(url).path.split("/")[-1]
     if not filename or not filename.endswith(".pdf"):
-        filename = f"{url_hash}.pdf"
+        filename = f"{get_url_hash(url)}.pdf"
     
     # Bereinigen
     filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    filepath = RAW_DIR / land_key / filename
+    return RAW_DIR / land_key / filename
+
+
+def download_pdf(entry, frontier, log, max_bytes):
+    """Lade PDF gestreamt herunter (inkrementell: nur, wenn es sich geändert hat)"""
+    url = entry["url"]
+    filepath = pdf_filepath(url, entry["land"])
+    filename = filepath.name
     
-    if filepath.exists():
+    if filepath.exists() and not frontier.incremental:
         print(f"  [SKIP] Bereits vorhanden: {filename}")
         return filepath
     
-    print(f"  [DOWNLOAD] {filename}...")
+    print(f"  [{'CHECK' if filepath.exists() else 'DOWNLOAD'}] {filename}...")
     
+    part = PartFile(filepath, max_bytes)
     try:
-        response = requests.get(url, headers=HEADERS, timeout=60)
-        response.raise_for_status()
-        
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-        
-        log["crawled"][url_hash] = {
-            "url": url,
-            "land": land_key,
-            "file": str(filepath),
-            "size": len(response.content),
-            "text": pdf_info.get("text", ""),
-            "time": datetime.now().isoformat(),
-        }
-        
+        # Zweiter Durchgang nur nach 416 mit verworfenem Teil (dann ohne Range)
+        for _ in range(2):
+            range_headers = part.range_headers(entry)
+            headers = {**HEADERS, **PDF_HEADERS, **conditional_headers(entry), **range_headers}
+            with requests.get(url, headers=headers, timeout=60, stream=True) as response:
+                if response.status_code == 416 and range_headers:
+                    status = finish_unsatisfiable_range(entry, response, part, frontier, log)
+                    if status is None:
+                        continue
+                    break
+                response.raise_for_status()
+                if response.status_code == 304:
+                    part.discard()
+                    frontier.not_modified(entry)
+                    status = "unchanged"
+                else:
+                    part.begin(entry, response, frontier)
+                    try:
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            part.write(chunk)
+                    finally:
+                        part.close()
+                    status = finish_pdf(entry, response.headers, part, frontier, log)
+            break
+        if status != "new":
+            print(f"  [{status.upper()}] {filename}")
         return filepath
         
     except Exception as e:
-        log["errors"].append({"url": url, "error": str(e), "time": datetime.now().isoformat()})
+        log.error(url, e)
         print(f"  [ERROR] {e}")
         return None
 
 
-def crawl_bundesland(land_key, land_info, log):
-    """Crawle alle Lehrplan-URLs eines Bundeslandes"""
-    print(f"\n{'='*60}")
-    print(f"[LAND] {land_info['name']}")
-    print(f"{'='*60}")
-    
-    all_pdfs = []
-    
-    for url in land_info["lehrplan_urls"]:
-        pdfs = crawl_page(url, land_key, log, depth=0, max_depth=2)
-        all_pdfs.extend(pdfs)
-        time.sleep(1)  # Pause zwischen Seiten
+def crawl_all(frontier, log, max_pdf_bytes):
+    """Frontier abarbeiten, bis nichts mehr wartet (sequentieller Modus)"""
+    while True:
+        entry = frontier.claim()
+        if entry is None:
+            break
+        if entry["kind"] == "pdf":
+            if download_pdf(entry, frontier, log, max_pdf_bytes):
+                frontier.done(entry)
+            else:
+                frontier.failed(entry, "download failed")
+        else:
+            crawl_page(entry, frontier, log)
+        time.sleep(0.5)  # Rate limiting
+
+
+def sync_views(frontier, migrate=False):
+    """Blob-Speicher und Ansichten abgleichen
+
+    Jede geladene URL bekommt eine Ansicht in jedem Bundesland, das sie
+    verlinkt (auch wenn es erst nach dem Download dazukam). Mit migrate
+    werden normale Dateien in raw/<land>/ (aus Läufen vor dem
+    Blob-Speicher oder von Hand abgelegt) in den Speicher übernommen;
+    eingecheckte Dateien bleiben, wie sie sind. Zum Schluss werden Blobs
+    gelöscht, die weder die Frontier noch eine Ansicht mehr braucht."""
+    store = blob_store()
+    adopted = 0
+    for path in RAW_DIR.glob("*/*.pdf") if migrate else ():
+        if path not in store.keep and not store.is_view(path):
+            store.adopt(path)
+            adopted += 1
+    views = 0
+    referenced = set()
+    for entry, lands in frontier.documents():
+        referenced.add(entry["sha256"])
+        if not store.path(entry["sha256"]).exists():
+            continue
+        for land in lands:
+            store.link(entry["sha256"], pdf_filepath(entry["url"], land))
+            views += 1
+    # Ersetzte Fassungen: weder in der Frontier noch hinter einer Ansicht
+    referenced.update(content_hash(path) for path in RAW_DIR.glob("*/*.pdf") if path.is_symlink())
+    removed, freed = store.gc(referenced)
+    blobs = sum(1 for _ in BLOB_DIR.glob("*/*.pdf"))
+    print(f"[BLOBS] {blobs} eindeutige PDFs, {views} Ansichten, {adopted} Dateien übernommen, "
+          f"{removed} verwaiste gelöscht ({freed / MB:.1f} MB)")
+
+
+# ============================================================================
+# ASYNC-MODUS
+# ============================================================================
+
+
+class HostLimiter:
+    """Pro Host: höchstens per_host gleichzeitige Requests, höchstens rate pro Sekunde"""
+
+    def __init__(self, per_host, rate):
+        self.per_host = per_host
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = {
+                "semaphore": asyncio.Semaphore(self.per_host),
+                "lock": asyncio.Lock(),
+                "next": 0.0,
+                "interval": self.interval,
+            }
+        return self._hosts[host]
+
+    async def acquire(self, url):
+        host = self._host(url)
+        await host["semaphore"].acquire()
+        # Startzeitpunkte gleichmäßig verteilen
+        async with host["lock"]:
+            now = time.monotonic()
+            wait = host["next"] - now
+            host["next"] = max(now, host["next"]) + host["interval"]
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, url):
+        self._host(url)["semaphore"].release()
+
+    def busy_hosts(self):
+        """Hosts, deren Requests-Kontingent gerade voll ausgeschöpft ist"""
+        return [name for name, host in self._hosts.items() if host["semaphore"].locked()]
+
+    def back_off(self, url, seconds):
+        """Host drosseln: Pause von seconds, danach halbe Rate"""
+        host = self._host(url)
+        host["interval"] = max(host["interval"] * 2, 1.0)
+        host["next"] = max(host["next"], time.monotonic() + seconds)
+
+
+# 429/503: so oft erneut versuchen, höchstens so lange warten
+MAX_RETRIES = 2
+MAX_RETRY_AFTER = 60
+
+
+def back_off_after(limiter, url, response):
+    """Host nach 429/503 für Retry-After pausieren"""
+    try:
+        retry_after = min(float(response.headers.get("Retry-After", "5")), MAX_RETRY_AFTER)
+    except ValueError:
+        retry_after = 5.0
+    print(f"  [WAIT] {urlparse(url).netloc} {response.status_code}, {retry_after:.0f}s Pause")
+    limiter.back_off(url, retry_after)
+
+
+async def fetch(client, limiter, url, timeout, headers=None):
+    """GET mit Host-Limit; wiederholt 429/503 nach Retry-After
+
+    304 (Not Modified) auf einen bedingten Request ist kein Fehler."""
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire(url)
+        try:
+            response = await client.get(url, timeout=timeout, headers=headers)
+        finally:
+            limiter.release(url)
+        if response.status_code in (429, 503) and attempt < MAX_RETRIES:
+            back_off_after(limiter, url, response)
+            continue
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+
+@asynccontextmanager
+async def fetch_stream(client, limiter, url, timeout, headers=None):
+    """Wie fetch, aber der Body wird gestreamt; der Host-Slot bleibt belegt,
+    bis der Aufrufer den Body gelesen hat
+
+    416 (Range Not Satisfiable) wertet der Aufrufer aus, wie 304."""
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire(url)
+        try:
+            async with client.stream("GET", url, timeout=timeout, headers=headers) as response:
+                if response.status_code in (429, 503) and attempt < MAX_RETRIES:
+                    back_off_after(limiter, url, response)
+                    continue
+                if response.status_code not in (304, 416):
+                    response.raise_for_status()
+                yield response
+                return
+        finally:
+            limiter.release(url)
+
+
+async def crawl_page_async(client, limiter, entry, frontier, log):
+    """
+    Wie crawl_page, mit gemeinsamem Client und Host-Limit
+    """
+    url = entry["url"]
+    print(f"  [CRAWL] [{entry['land']}] {url[:80]}...")
     
-    # Deduplizieren
-    seen = set()
-    unique_pdfs = []
-    for pdf in all_pdfs:
-        if pdf["url"] not in seen:
-            seen.add(pdf["url"])
-            unique_pdfs.append(pdf)
+    try:
+        response = await fetch(client, limiter, url, timeout=30, headers=conditional_headers(entry))
+    except Exception as e:
+        log.error(url, e)
+        print(f"  [ERROR] {e}")
+        frontier.failed(entry, e)
+        return
     
-    print(f"\n  Gefunden: {len(unique_pdfs)} PDFs")
+    # Markiere als gecrawlt
+    mark_crawled(url, entry["land"], log, response.status_code)
+    if record_page(entry, response, frontier):
+        # Parsen im Thread, damit die Event-Loop weiter Antworten annimmt
+        links = await asyncio.to_thread(relevant_links, response.text, url)
+        enqueue_links(frontier, entry, links)
+    frontier.done(entry)
+
+
+async def download_pdf_async(client, limiter, entry, frontier, log, max_bytes):
+    """Lade PDF gestreamt herunter (async)"""
+    url = entry["url"]
+    filepath = pdf_filepath(url, entry["land"])
+    filename = filepath.name
     
-    # PDFs herunterladen
-    downloaded = 0
-    for pdf in unique_pdfs:
-        result = download_pdf(pdf, land_key, log)
-        if result:
-            downloaded += 1
-        time.sleep(0.5)  # Rate limiting
+    if filepath.exists() and not frontier.incremental:
+        print(f"  [SKIP] Bereits vorhanden: {filename}")
+        return filepath
     
-    print(f"  Heruntergeladen: {downloaded} PDFs")
+    print(f"  [{'CHECK' if filepath.exists() else 'DOWNLOAD'}] {filename}...")
     
-    return unique_pdfs
+    part = PartFile(filepath, max_bytes)
+    try:
+        # Zweiter Durchgang nur nach 416 mit verworfenem Teil (dann ohne Range)
+        for _ in range(2):
+            range_headers = part.range_headers(entry)
+            headers = {**PDF_HEADERS, **conditional_headers(entry), **range_headers}
+            async with fetch_stream(client, limiter, url, timeout=60, headers=headers) as response:
+                if response.status_code == 416 and range_headers:
+                    status = finish_unsatisfiable_range(entry, response, part, frontier, log)
+                    if status is None:
+                        continue
+                    break
+                if response.status_code != 304:
+                    response.raise_for_status()
+                if response.status_code == 304:
+                    part.discard()
+                    frontier.not_modified(entry)
+                    status = "unchanged"
+                else:
+                    part.begin(entry, response, frontier)
+                    try:
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            part.write(chunk)
+                    finally:
+                        part.close()
+                    status = finish_pdf(entry, response.headers, part, frontier, log)
+            break
+        if status != "new":
+            print(f"  [{status.upper()}] {filename}")
+        return filepath
+        
+    except Exception as e:
+        log.error(url, e)
+        print(f"  [ERROR] {e}")
+        return None
+
+
+async def crawl_all_async(frontier, log, per_host, rate, connections, max_pdf_bytes):
+    """Frontier mit `connections` gleichzeitigen Tasks über einen Client abarbeiten
+
+    Ein Task holt nur Einträge von Hosts, die noch freie Kapazität haben;
+    er endet, wenn nichts mehr wartet und kein anderer Task mehr läuft
+    (dessen Seite könnte neue Links einreihen)."""
+    import httpx
+
+    limiter = HostLimiter(per_host, rate)
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    state = {"running": 0}
+
+    async with httpx.AsyncClient(headers=HEADERS, limits=limits, follow_redirects=True) as client:
+        async def worker():
+            while True:
+                entry = frontier.claim(limiter.busy_hosts())
+                if entry is None:
+                    if state["running"] == 0:
+                        return
+                    await asyncio.sleep(0.1)
+                    continue
+                state["running"] += 1
+                try:
+                    if entry["kind"] == "pdf":
+                        if await download_pdf_async(client, limiter, entry, frontier, log, max_pdf_bytes):
+                            frontier.done(entry)
+                        else:
+                            frontier.failed(entry, "download failed")
+                    else:
+                        await crawl_page_async(client, limiter, entry, frontier, log)
+                finally:
+                    state["running"] -= 1
+
+        await asyncio.gather(*(worker() for _ in range(connections)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Schulcurricula Crawler für Meoluna")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="alle Hosts gleichzeitig crawlen (benötigt httpx)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="async: gleichzeitige Requests pro Host (default: 4)")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="async: Requests pro Sekunde und Host (default: 2)")
+    parser.add_argument("--connections", type=int, default=32,
+                        help="async: Verbindungen im Pool insgesamt (default: 32)")
+    parser.add_argument("--order", choices=["bfs", "priority"], default="bfs",
+                        help="Reihenfolge der Frontier (default: bfs)")
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH,
+                        help=f"Tiefe ab den Start-URLs (default: {MAX_DEPTH})")
+    parser.add_argument("--restart", action="store_true",
+                        help="Frontier verwerfen und neu bei den Start-URLs beginnen")
+    parser.add_argument("--max-pdf-mb", type=float, default=MAX_PDF_MB,
+                        help=f"größere PDFs nicht laden (default: {MAX_PDF_MB})")
+    parser.add_argument("--migrate-blobs", action="store_true",
+                        help="vorhandene Dateien in raw/ in den Blob-Speicher übernehmen")
+    parser.add_argument("--incremental", action="store_true",
+                        help="bekannte URLs nach --max-age Tagen bedingt erneut abfragen")
+    parser.add_argument("--max-age", type=float, default=MAX_AGE_DAYS,
+                        help=f"--incremental: Frische in Tagen (default: {MAX_AGE_DAYS})")
+    return parser.parse_args()
 
 
 def main():
     """Hauptfunktion"""
     import sys
     import io
+    args = parse_args()
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     
     print("[START] Meoluna Schulcurricula Crawler")
@@ -383,32 +903,38 @@ def main():
     
     setup_directories()
     log = load_log()
+    revisit_after = args.max_age * 86400 if args.incremental else None
+    max_pdf_bytes = int(args.max_pdf_mb * MB)
+    frontier = Frontier(FRONTIER_FILE, order=args.order, revisit_after=revisit_after)
+    if args.restart:
+        frontier.reset()
+    frontier.resume()
+    seed_frontier(frontier, args.max_depth)
+    print(f"[FRONTIER] {frontier.counts()}")
     
-    total_pdfs = 0
-    
-    for land_key, land_info in BUNDESLAENDER.items():
-        try:
-            pdfs = crawl_bundesland(land_key, land_info, log)
-            total_pdfs += len(pdfs)
-            save_log(log)  # Zwischenspeichern
-        except KeyboardInterrupt:
-            print("\n\n[ABORT] Abgebrochen durch Benutzer")
-            save_log(log)
-            break
-        except Exception as e:
-            print(f"\n  [FATAL ERROR] {land_key}: {e}")
-            log["errors"].append({
-                "land": land_key, 
-                "error": str(e), 
-                "time": datetime.now().isoformat()
-            })
+    try:
+        if args.use_async:
+            asyncio.run(crawl_all_async(
+                frontier, log, args.per_host, args.rate, args.connections, max_pdf_bytes
+            ))
+        else:
+            crawl_all(frontier, log, max_pdf_bytes)
+    except KeyboardInterrupt:
+        print("\n\n[ABORT] Abgebrochen durch Benutzer (Fortsetzung beim nächsten Start)")
     
-    save_log(log)
+    log_counts = log.counts()
+    log.close()
+    sync_views(frontier, args.migrate_blobs)
+    total_pdfs = frontier.total("pdf")
+    changed = len(frontier.needs_parse())
+    counts = frontier.counts()
+    frontier.close()
     
     print("\n" + "=" * 60)
-    print(f"[DONE] Fertig! Insgesamt {total_pdfs} PDFs gefunden")
+    print(f"[DONE] Fertig! Insgesamt {total_pdfs} PDFs gefunden, {changed} neu oder geändert (noch nicht geparst)")
+    print(f"[FRONTIER] {counts}")
     print(f"[DIR] Daten in: {BASE_DIR}")
-    print(f"[LOG] Log in: {LOG_FILE}")
+    print(f"[LOG] Log in: {LOG_FILE} ({log_counts['crawled']} URLs, {log_counts['errors']} Fehler)")
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ Parst Lehrplan-PDFs und extrahiert strukturierte Themen mit Claude API.
 
 Usage:
     python parse_curriculum_pdfs.py [--bundesland bayern] [--limit 5] [--output topics.json]
+    python parse_curriculum_pdfs.py --changed   # nur neue/geänderte PDFs laut Crawler
 
 Requirements:
     pip install anthropic pdfplumber tqdm
@@ -19,6 +20,8 @@ from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
+from crawl_blobs import content_hash
+
 try:
     import anthropic
 except ImportError:
@@ -49,6 +52,9 @@ CURRICULUM_DIR = Path(__file__).parent.parent / "data" / "curricula" / "raw"
 # Output-Verzeichnis
 OUTPUT_DIR = Path(__file__).parent.parent / "data" / "curricula" / "parsed"
 
+# Frontier des Crawlers (needs_parse für --changed)
+FRONTIER_FILE = Path(__file__).parent.parent / "data" / "curricula" / "frontier.db"
+
 # Fächer-Mapping (Dateiname-Keywords -> Subject Slug)
 SUBJECT_MAPPING = {
     "mathematik": "mathematik",
@@ -310,21 +316,47 @@ def find_pdf_files(base_dir: Path, bundesland: Optional[str] = None) -> list:
     return pdf_files
 
 
+def find_changed_pdf_files(frontier, bundesland: Optional[str] = None) -> dict:
+    """PDFs, die der Crawler seit dem letzten Parsen neu geladen oder geändert hat
+    (je eine Ansicht pro Bundesland, das die URL verlinkt), mit ihrem Frontier-Eintrag."""
+    pdf_files = {
+        CURRICULUM_DIR / land / Path(entry["file"]).name: entry
+        for entry in frontier.needs_parse()
+        for land in frontier.lands(entry["url"])
+    }
+    if bundesland:
+        land = bundesland.lower().replace(" ", "-")
+        pdf_files = {p: e for p, e in pdf_files.items() if p.parent.name == land}
+    return {p: e for p, e in pdf_files.items() if p.exists()}
+
+
 def process_pdfs(
     api_key: str,
     bundesland: Optional[str] = None,
     limit: Optional[int] = None,
-    output_file: Optional[str] = None
+    output_file: Optional[str] = None,
+    changed_only: bool = False
 ) -> dict:
     """Hauptfunktion: Verarbeitet PDFs und extrahiert Themen."""
 
     client = anthropic.Anthropic(api_key=api_key)
 
     # PDFs finden
-    pdf_files = find_pdf_files(CURRICULUM_DIR, bundesland)
+    frontier = None
+    changed = {}
+    if changed_only:
+        from crawl_frontier import Frontier
+
+        frontier = Frontier(FRONTIER_FILE)
+        changed = find_changed_pdf_files(frontier, bundesland)
+        pdf_files = list(changed)
+    else:
+        pdf_files = find_pdf_files(CURRICULUM_DIR, bundesland)
 
     if not pdf_files:
         print(f"Keine PDFs gefunden in {CURRICULUM_DIR}")
+        if frontier is not None:
+            frontier.close()
         return {"topics": [], "metadata": {}}
 
     print(f"Gefunden: {len(pdf_files)} PDFs")
@@ -333,16 +365,25 @@ def process_pdfs(
         pdf_files = pdf_files[:limit]
         print(f"Limitiert auf: {limit} PDFs")
 
+    # Inhaltsgleiche PDFs (Ansichten desselben Blobs, siehe crawl_blobs.py,
+    # oder Kopien) nur einmal parsen; die Themen gelten für jedes Bundesland
+    groups = {}
+    for pdf_path in pdf_files:
+        groups.setdefault(content_hash(pdf_path), []).append(pdf_path)
+    if len(groups) < len(pdf_files):
+        print(f"Davon inhaltsgleich: {len(pdf_files) - len(groups)} (werden nur einmal geparst)")
+
     # Ergebnisse sammeln
     all_topics = []
     processed_files = []
     errors = []
 
-    for pdf_path in tqdm(pdf_files, desc="Verarbeite PDFs"):
+    for group in tqdm(list(groups.values()), desc="Verarbeite PDFs"):
+        pdf_path = group[0]
         # Bundesland aus Pfad extrahieren
         bl = pdf_path.parent.name
 
-        print(f"\nVerarbeite: {pdf_path.name} ({bl})")
+        print(f"\nVerarbeite: {pdf_path.name} ({', '.join(p.parent.name for p in group)})")
 
         # Text extrahieren
         text = extract_text_from_pdf(pdf_path)
@@ -358,17 +399,19 @@ def process_pdfs(
         topics_count = len(result.get("topics", []))
         print(f"  Extrahiert: {topics_count} Themen")
 
-        # Themen mit Bundesland anreichern
-        for topic in result.get("topics", []):
-            topic["bundesland"] = bl
-            topic["sourceUrl"] = str(pdf_path)
-            all_topics.append(topic)
+        for view in group:
+            # Themen mit Bundesland anreichern
+            for topic in result.get("topics", []):
+                all_topics.append({**topic, "bundesland": view.parent.name, "sourceUrl": str(view)})
 
-        processed_files.append({
-            "file": pdf_path.name,
-            "bundesland": bl,
-            "topics_extracted": topics_count,
-        })
+            processed_files.append({
+                "file": view.name,
+                "bundesland": view.parent.name,
+                "topics_extracted": topics_count,
+            })
+            # API-Fehler: markiert lassen, damit der nächste --changed-Lauf es erneut versucht
+            if view in changed and "error" not in result.get("metadata", {}):
+                frontier.parsed(changed[view])
 
     # Ergebnis zusammenstellen
     final_result = {
@@ -390,6 +433,9 @@ def process_pdfs(
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(final_result, f, ensure_ascii=False, indent=2)
 
+    if frontier is not None:
+        frontier.close()
+
     print(f"\n{'='*50}")
     print(f"FERTIG!")
     print(f"  Verarbeitete PDFs: {len(processed_files)}")
@@ -421,6 +467,11 @@ def main():
         "--output", "-o",
         help="Output-Dateiname (Standard: topics_TIMESTAMP.json)"
     )
+    parser.add_argument(
+        "--changed", "-c",
+        action="store_true",
+        help="Nur PDFs, die der Crawler neu geladen oder geändert hat (needs_parse)"
+    )
     parser.add_argument(
         "--api-key", "-k",
         help="Anthropic API Key (oder ANTHROPIC_API_KEY Umgebungsvariable)"
@@ -440,7 +491,8 @@ def main():
         api_key=api_key,
         bundesland=args.bundesland,
         limit=args.limit,
-        output_file=args.output
+        output_file=args.output,
+        changed_only=args.changed
     )
 
 
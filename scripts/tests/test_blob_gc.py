@@ -0,0 +1,43 @@
+"""
+Aufräumen des Blob-Speichers (crawl_blobs.BlobStore.gc).
+
+    python -m pytest scripts/tests
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawl_blobs import BlobStore, content_hash  # noqa: E402
+
+
+def _blob(store, tmp_path, content):
+    sha256 = hashlib.sha256(content).hexdigest()
+    source = tmp_path / "download.part"
+    source.write_bytes(content)
+    store.put(source, sha256)
+    return sha256
+
+
+def test_gc_keeps_referenced_and_viewed_blobs(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    in_frontier = _blob(store, tmp_path, b"%PDF frontier")
+    symlinked = _blob(store, tmp_path, b"%PDF symlink view")
+    hardlinked = _blob(store, tmp_path, b"%PDF hardlink view")
+    orphan = _blob(store, tmp_path, b"%PDF replaced version")
+
+    view = tmp_path / "raw" / "berlin" / "plan.pdf"
+    store.link(symlinked, view)
+    os.link(store.path(hardlinked), tmp_path / "hardlink.pdf")
+
+    removed, freed = store.gc({in_frontier, content_hash(view)})
+
+    assert (removed, freed) == (1, len(b"%PDF replaced version"))
+    assert not store.path(orphan).exists()
+    assert not store.path(orphan).parent.exists() or any(store.path(orphan).parent.iterdir())
+    for sha256 in (in_frontier, symlinked, hardlinked):
+        assert store.path(sha256).exists()
+    assert view.read_bytes() == b"%PDF symlink view"
@@ -0,0 +1,136 @@
+"""
+Fortsetzen von PDF-Downloads (curriculum_crawler.PartFile) gegen einen
+lokalen Server mit Range-Unterstützung.
+
+    python -m pytest scripts/tests
+"""
+
+import asyncio
+import http.server
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import curriculum_crawler as cc  # noqa: E402
+from crawl_frontier import Frontier  # noqa: E402
+from crawl_log import CrawlLog  # noqa: E402
+
+BODY = b"%PDF-1.4 " + bytes(range(256)) * 64
+ETAG = '"v1"'
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Liefert BODY, versteht Range/If-Range und antwortet 416 hinter dem Ende"""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        RangeHandler.requests.append(self.headers.get("Range"))
+        start = 0
+        if self.headers.get("Range") and self.headers.get("If-Range") == ETAG:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+        if start >= len(BODY):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(BODY)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY) - start))
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+        self.end_headers()
+        self.wfile.write(BODY[start:])
+
+
+@pytest.fixture
+def server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    RangeHandler.requests = []
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+
+@pytest.fixture
+def crawl(tmp_path, monkeypatch, server):
+    monkeypatch.setattr(cc, "RAW_DIR", tmp_path / "raw")
+    monkeypatch.setattr(cc, "BLOB_DIR", tmp_path / "blobs")
+    (tmp_path / "raw" / "land").mkdir(parents=True)
+    frontier = Frontier(tmp_path / "frontier.db")
+    log = CrawlLog(tmp_path / "crawl_log.db")
+    url = f"{server}/files/plan.pdf"
+    frontier.add(url, "land", "pdf", depth=1, max_depth=2)
+    entry = frontier.claim()
+    yield frontier, log, entry
+    frontier.close()
+    log.close()
+
+
+def _part(entry, content, validator=ETAG):
+    part = cc.PartFile(cc.pdf_filepath(entry["url"], "land"), cc.MB)
+    part.path.write_bytes(content)
+    entry["partial_validator"] = validator
+    return part
+
+
+def _download(mode, entry, frontier, log):
+    if mode == "sync":
+        return cc.download_pdf(entry, frontier, log, cc.MB)
+
+    async def run():
+        import httpx
+
+        async with httpx.AsyncClient() as client:
+            limiter = cc.HostLimiter(per_host=1, rate=0)
+            return await cc.download_pdf_async(client, limiter, entry, frontier, log, cc.MB)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_complete_part_is_finalized_after_416(mode, crawl):
+    frontier, log, entry = crawl
+    part = _part(entry, BODY)
+
+    filepath = _download(mode, entry, frontier, log)
+
+    assert filepath is not None
+    assert filepath.read_bytes() == BODY
+    assert not part.path.exists()
+    assert RangeHandler.requests == [f"bytes={len(BODY)}-"]
+    row = frontier.db.execute("SELECT partial_validator, etag, needs_parse FROM frontier").fetchone()
+    assert tuple(row) == (None, ETAG, 1)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_oversized_part_is_discarded_and_refetched(mode, crawl):
+    frontier, log, entry = crawl
+    part = _part(entry, BODY + b"garbage")
+
+    filepath = _download(mode, entry, frontier, log)
+
+    assert filepath is not None
+    assert filepath.read_bytes() == BODY
+    assert not part.path.exists()
+    assert RangeHandler.requests == [f"bytes={len(BODY) + 7}-", None]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_partial_download_resumes(mode, crawl):
+    frontier, log, entry = crawl
+    _part(entry, BODY[:1000])
+
+    filepath = _download(mode, entry, frontier, log)
+
+    assert filepath.read_bytes() == BODY
+    assert RangeHandler.requests == ["bytes=1000-"]